@@ -2,8 +2,178 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import sqlite3
 import os
+import csv
+import json
+
+from schema import create_schema, migrate
 
 VALID_ROOM_TYPES = {"standard", "lab", "auditorium"}
+PAGE_SIZE = 200
+BATCH_SIZE = 1000
+
+
+# Row validation shared by the editor forms and bulk import. Each takes the
+# field values as strings and returns the row to insert, or raises ValueError.
+def validate_room(name, type_, capacity):
+    if not name.strip() or not type_.strip() or not capacity.strip():
+        raise ValueError("All fields must be filled.")
+    if type_.lower() not in VALID_ROOM_TYPES:
+        raise ValueError("Invalid room type.")
+    return name, type_, int(capacity)
+
+def validate_teacher(name):
+    if not name.strip():
+        raise ValueError("No field can be empty.")
+    return (name,)
+
+def validate_subject(name, requires_lab):
+    if not name.strip() or not requires_lab.strip():
+        raise ValueError("No field can be empty.")
+    if requires_lab.strip() not in ("0", "1"):
+        raise ValueError("Requires lab must be 0 or 1.")
+    return name, int(requires_lab)
+
+def validate_group(name, subject_id, teacher_id, count, frecuency):
+    if not name.strip():
+        raise ValueError("Group name cannot be empty.")
+    count = int(count)
+    frecuency = int(frecuency)
+    if count <= 0 or frecuency <= 0:
+        raise ValueError("Counts must be positive.")
+    return name, int(subject_id), int(teacher_id), count, frecuency
+
+
+# Bulk import/export layout of the editable tables: file columns besides the
+# optional id, the key its UNIQUE index enforces, and the columns that
+# must reference an existing row.
+BULK_TABLES = {
+    "Rooms": {"table": "rooms", "columns": ["name", "type", "capacity"], "validate": validate_room,
+              "key": lambda row: row},
+    "Teachers": {"table": "teachers", "columns": ["name"], "validate": validate_teacher,
+                 "key": lambda row: row},
+    "Subjects": {"table": "subjects", "columns": ["name", "requires_lab"], "validate": validate_subject,
+                 "key": lambda row: row},
+    "Groups": {"table": "groups",
+               "columns": ["name", "subject_id", "teacher_id", "student_count", "frecuency_count"],
+               "validate": validate_group, "key": lambda row: (row[1], row[2]),
+               "references": {1: "subjects", 2: "teachers"}},
+}
+
+
+def file_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    return {".csv": "csv", ".jsonl": "jsonl"}.get(ext, "json")
+
+def read_records(path):
+    # Yields (line, record). CSV and JSON Lines files are streamed; a .json
+    # file holds one array of objects and is read whole. Unreadable records
+    # are yielded as None so they get reported with the rejected rows.
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format(path) == "csv":
+            yield from enumerate(csv.DictReader(f), start=2)
+        elif file_format(path) == "jsonl":
+            for line, text in enumerate(f, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    yield line, json.loads(text)
+                except ValueError:
+                    yield line, None
+        else:
+            records = json.load(f)
+            if not isinstance(records, list):
+                raise ValueError("A .json file must hold an array of row objects.")
+            yield from enumerate(records, start=1)
+
+def record_field(record, column):
+    value = record.get(column)
+    if isinstance(value, bool):
+        # JSON true/false, as in requires_lab
+        return "1" if value else "0"
+    return "" if value is None else str(value).strip()
+
+def import_rows(conn, name, path):
+    # Streams the file into the table in one transaction, BATCH_SIZE rows per
+    # executemany. Rows are checked against the same rules as the editor and
+    # against the unique indexes, so one bad row cannot abort the batch.
+    # Returns the number of inserted rows and (line, reason) for the rejected.
+    spec = BULK_TABLES[name]
+    table, columns = spec["table"], spec["columns"]
+    cursor = conn.cursor()
+    seen = {spec["key"](row) for row in cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")}
+    ids = {row[0] for row in cursor.execute(f"SELECT id FROM {table}")}
+    references = {
+        index: {row[0] for row in cursor.execute(f"SELECT id FROM {other}")}
+        for index, other in spec.get("references", {}).items()
+    }
+    sql = f"INSERT INTO {table} (id, {', '.join(columns)}) VALUES ({', '.join('?' * (len(columns) + 1))})"
+
+    inserted = 0
+    rejected = []
+    batch = []
+    try:
+        for line, record in read_records(path):
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError("Not a row object.")
+                row = spec["validate"](*(record_field(record, column) for column in columns))
+                # A missing id lets SQLite assign one; keeping ids makes
+                # exported groups point at the same subjects and teachers.
+                row_id = int(record_field(record, "id")) if record_field(record, "id") else None
+                if row_id is not None and row_id in ids:
+                    raise ValueError(f"Duplicate id {row_id}.")
+                for index, valid in references.items():
+                    if row[index] not in valid:
+                        raise ValueError(f"Unknown {columns[index]} {row[index]}.")
+                key = spec["key"](row)
+                if key in seen:
+                    raise ValueError("Duplicate entry.")
+            except ValueError as e:
+                rejected.append((line, str(e)))
+                continue
+            seen.add(key)
+            if row_id is not None:
+                ids.add(row_id)
+            batch.append((row_id,) + row)
+            if len(batch) >= BATCH_SIZE:
+                cursor.executemany(sql, batch)
+                inserted += len(batch)
+                batch = []
+        cursor.executemany(sql, batch)
+        inserted += len(batch)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return inserted, rejected
+
+def export_rows(conn, name, path):
+    # Streams the table, ids included, to CSV, JSON Lines or a JSON array
+    # depending on the extension, in the layout import_rows reads back.
+    spec = BULK_TABLES[name]
+    columns = ["id"] + spec["columns"]
+    cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {spec['table']} ORDER BY id")
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if file_format(path) == "csv":
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in cursor:
+                writer.writerow(row)
+                count += 1
+        elif file_format(path) == "jsonl":
+            for row in cursor:
+                f.write(json.dumps(dict(zip(columns, row))) + "\n")
+                count += 1
+        else:
+            f.write("[")
+            for row in cursor:
+                f.write(",\n" if count else "\n")
+                f.write(json.dumps(dict(zip(columns, row))))
+                count += 1
+            f.write("\n]\n")
+    return count
+
 
 class DatabaseEditor:
     def __init__(self, root):
@@ -22,6 +192,8 @@ class DatabaseEditor:
         ttk.Button(self.toolbar, text="New Database", command=self.create_database).pack(side=tk.LEFT, padx=5, pady=5)
         ttk.Button(self.toolbar, text="Open Database", command=self.open_database).pack(side=tk.LEFT, padx=5, pady=5)
         ttk.Button(self.toolbar, text="Refresh", command=self.populate_tabs).pack(side=tk.LEFT, padx=5, pady=5)
+        ttk.Button(self.toolbar, text="Import...", command=self.import_file).pack(side=tk.LEFT, padx=5, pady=5)
+        ttk.Button(self.toolbar, text="Export...", command=self.export_file).pack(side=tk.LEFT, padx=5, pady=5)
 
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -32,6 +204,17 @@ class DatabaseEditor:
             self.tabs[name] = frame
             self.notebook.add(frame, text=name)
 
+        # Tabs are built the first time they are shown, see show_current_tab
+        self.tab_builders = {
+            "Rooms": self.init_rooms_tab,
+            "Teachers": self.init_teachers_tab,
+            "Subjects": self.init_subjects_tab,
+            "Groups": self.init_groups_tab,
+            "Timeslots": self.init_timeslots_tab,
+        }
+        self.built_tabs = set()
+        self.notebook.bind("<<NotebookTabChanged>>", self.show_current_tab)
+
     def create_database(self):
         path = filedialog.asksaveasfilename(defaultextension=".db", filetypes=[("SQLite DB", "*.db")])
         if not path:
@@ -41,9 +224,8 @@ class DatabaseEditor:
         self.conn = sqlite3.connect(self.db_path)
         self.cursor = self.conn.cursor()
 
-        self.cursor.executescript(""" ... """)  # Keep your full SQL schema here as-is.
-        self.conn.commit()
-        messagebox.showinfo("Success", "Database created with triggers.")
+        create_schema(self.conn)
+        messagebox.showinfo("Success", "Database created.")
         self.populate_tabs()
 
     def open_database(self):
@@ -53,53 +235,114 @@ class DatabaseEditor:
         self.db_path = path
         self.conn = sqlite3.connect(self.db_path)
         self.cursor = self.conn.cursor()
+        # Older databases are upgraded in place; one that cannot be (e.g. it
+        # holds duplicate rows) still opens on its current schema.
+        try:
+            migrate(self.conn)
+        except Exception as e:
+            messagebox.showerror("Upgrade Error", str(e))
         self.populate_tabs()
 
     def populate_tabs(self):
         for name in self.tabs:
-            for widget in self.tabs[name].winfo_children():
-                widget.destroy()
-
-        self.init_rooms_tab()
-        self.init_teachers_tab()
-        self.init_subjects_tab()
-        self.init_groups_tab()
-        self.init_timeslots_tab()
+            self.clear_tab(name)
+        self.show_current_tab()
+
+    def clear_tab(self, name):
+        # The tab is rebuilt, with fresh data, the next time it is shown
+        for widget in self.tabs[name].winfo_children():
+            widget.destroy()
+        self.built_tabs.discard(name)
+        if self.conn and self.notebook.select() == str(self.tabs[name]):
+            self.show_current_tab()
+
+    def show_current_tab(self, event=None):
+        if not self.conn:
+            return
+        name = self.notebook.tab(self.notebook.select(), "text")
+        if name not in self.built_tabs:
+            self.built_tabs.add(name)
+            self.tab_builders[name]()
+
+    def bulk_tab(self):
+        name = self.notebook.tab(self.notebook.select(), "text")
+        if not self.conn or name not in BULK_TABLES:
+            messagebox.showerror("Error", "Open a database and select the Rooms, Teachers, Subjects or Groups tab.")
+            return None
+        return name
+
+    def import_file(self):
+        name = self.bulk_tab()
+        if not name:
+            return
+        path = filedialog.askopenfilename(
+            title=f"Import {name}", filetypes=[("CSV", "*.csv"), ("JSON", "*.json"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+        try:
+            inserted, rejected = import_rows(self.conn, name, path)
+        except Exception as e:
+            messagebox.showerror("Import Error", f"Nothing was imported: {e}")
+            return
+        self.populate_tabs()
+        message = f"Imported {inserted} rows into {name}."
+        if rejected:
+            lines = "\n".join(f"Line {line}: {reason}" for line, reason in rejected[:20])
+            more = f"\n... and {len(rejected) - 20} more" if len(rejected) > 20 else ""
+            messagebox.showwarning("Import", f"{message}\nRejected {len(rejected)} rows:\n{lines}{more}")
+        else:
+            messagebox.showinfo("Import", message)
+
+    def export_file(self):
+        name = self.bulk_tab()
+        if not name:
+            return
+        path = filedialog.asksaveasfilename(
+            title=f"Export {name}", defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON", "*.json"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+        try:
+            count = export_rows(self.conn, name, path)
+            messagebox.showinfo("Export", f"Exported {count} rows from {name}.")
+        except Exception as e:
+            messagebox.showerror("Export Error", str(e))
 
     def init_rooms_tab(self):
         self.init_table_editor(
             "Rooms",
             ["Name", "Type", "Capacity"],
             self.insert_room,
-            lambda: self.cursor.execute("SELECT id, name, type, capacity FROM rooms"),
+            lambda after, limit: self.cursor.execute(
+                "SELECT id, name, type, capacity FROM rooms WHERE id > ? ORDER BY id LIMIT ?", (after, limit)),
             lambda rid: self.cursor.execute("DELETE FROM rooms WHERE id=?", (rid,)),
             custom_widgets={1: ttk.Combobox, 'choices': ["standard", "lab", "auditorium"]}
         )
 
     def insert_room(self, values):
-        name, type_, capacity = values
-        if not name.strip() or not type_.strip() or not capacity.strip():
-            raise ValueError("All fields must be filled.")
-        if type_.lower() not in VALID_ROOM_TYPES:
-            raise ValueError("Invalid room type.")
-        self.cursor.execute("INSERT INTO rooms (name, type, capacity) VALUES (?, ?, ?)", (name, type_, int(capacity)))
+        self.cursor.execute("INSERT INTO rooms (name, type, capacity) VALUES (?, ?, ?)", validate_room(*values))
 
     def init_teachers_tab(self):
         self.init_table_editor(
             "Teachers",
             ["Name"],
-            lambda values: self.cursor.execute("INSERT INTO teachers (name) VALUES (?)", values),
-            lambda: self.cursor.execute("SELECT id, name FROM teachers"),
-            lambda rid: self.cursor.execute("DELETE FROM teachers WHERE id=?", (rid,))
+            lambda values: self.cursor.execute("INSERT INTO teachers (name) VALUES (?)", validate_teacher(*values)),
+            lambda after, limit: self.cursor.execute(
+                "SELECT id, name FROM teachers WHERE id > ? ORDER BY id LIMIT ?", (after, limit)),
+            lambda rid: self.cursor.execute("DELETE FROM teachers WHERE id=?", (rid,)),
+            invalidates=["Groups"]
         )
 
     def init_subjects_tab(self):
         self.init_table_editor(
             "Subjects",
             ["Name", "Requires Lab (0/1)"],
-            lambda values: self.cursor.execute("INSERT INTO subjects (name, requires_lab) VALUES (?, ?)", values),
-            lambda: self.cursor.execute("SELECT id, name, requires_lab FROM subjects"),
-            lambda rid: self.cursor.execute("DELETE FROM subjects WHERE id=?", (rid,))
+            lambda values: self.cursor.execute(
+                "INSERT INTO subjects (name, requires_lab) VALUES (?, ?)", validate_subject(*values)),
+            lambda after, limit: self.cursor.execute(
+                "SELECT id, name, requires_lab FROM subjects WHERE id > ? ORDER BY id LIMIT ?", (after, limit)),
+            lambda rid: self.cursor.execute("DELETE FROM subjects WHERE id=?", (rid,)),
+            invalidates=["Groups"]
         )
 
     def init_groups_tab(self):
@@ -135,18 +378,12 @@ class DatabaseEditor:
 
         def add_group():
             try:
-                name = name_var.get().strip()
-                if not name:
-                    raise ValueError("Group name cannot be empty.")
-                subject_id = subject_map[subject_var.get()]
-                teacher_id = teacher_map[teacher_var.get()]
-                count = int(count_var.get())
-                frecuency = int(frecuency_var.get())
-                if count <= 0 or frecuency <= 0:
-                    raise ValueError("Counts must be positive.")
+                row = validate_group(
+                    name_var.get().strip(), subject_map[subject_var.get()], teacher_map[teacher_var.get()],
+                    count_var.get(), frecuency_var.get())
                 self.cursor.execute(
                     "INSERT INTO groups (name, subject_id, teacher_id, student_count, frecuency_count) VALUES (?, ?, ?, ?, ?)",
-                    (name, subject_id, teacher_id, count, frecuency))
+                    row)
                 self.conn.commit()
                 refresh_table()
             except Exception as e:
@@ -162,21 +399,13 @@ class DatabaseEditor:
         ttk.Button(frame, text="Add", command=add_group).grid(row=2, column=0, pady=5)
         ttk.Button(frame, text="Delete", command=delete_selected).grid(row=2, column=1, pady=5)
 
-        table = ttk.Treeview(frame, columns=(0, 1, 2, 3, 4, 5), show="headings", height=15)
-        table.grid(row=3, column=0, columnspan=6)
-
-        for i, col in enumerate(["ID", "Group Name", "Subject ID", "Teacher ID", "Student Count", "Weekly Frecuency"]):
-            table.heading(i, text=col)
-            table.column(i, width=120)
-
-        def refresh_table():
-            for row in table.get_children():
-                table.delete(row)
-            self.cursor.execute("SELECT id, name, subject_id, teacher_id, student_count, frecuency_count FROM groups")
-            for row in self.cursor.fetchall():
-                table.insert("", "end", values=row)
-
-        refresh_table()
+        table, refresh_table = self.init_paged_table(
+            frame,
+            ["ID", "Group Name", "Subject ID", "Teacher ID", "Student Count", "Weekly Frecuency"],
+            lambda after, limit: self.cursor.execute(
+                "SELECT id, name, subject_id, teacher_id, student_count, frecuency_count FROM groups "
+                "WHERE id > ? ORDER BY id LIMIT ?", (after, limit)),
+            row=3, columnspan=6)
 
     def init_timeslots_tab(self):
         frame = self.tabs["Timeslots"]
@@ -212,7 +441,8 @@ class DatabaseEditor:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate timeslots: {e}")
 
-    def init_table_editor(self, tab_name, fields, insert_callback, select_callback, delete_callback, custom_widgets=None):
+    def init_table_editor(self, tab_name, fields, insert_callback, select_callback, delete_callback, custom_widgets=None,
+                          invalidates=()):
         frame = self.tabs[tab_name]
         entry_vars = []
         for idx, field in enumerate(fields):
@@ -235,6 +465,8 @@ class DatabaseEditor:
                 insert_callback(values)
                 self.conn.commit()
                 refresh_table()
+                for name in invalidates:
+                    self.clear_tab(name)
             except Exception as e:
                 messagebox.showerror("Insert Error", str(e))
 
@@ -244,24 +476,63 @@ class DatabaseEditor:
                 delete_callback(rid)
             self.conn.commit()
             refresh_table()
+            for name in invalidates:
+                self.clear_tab(name)
 
         ttk.Button(frame, text="Add", command=add_entry).grid(row=2, column=0, pady=5)
         ttk.Button(frame, text="Delete", command=delete_selected).grid(row=2, column=1, pady=5)
 
-        table = ttk.Treeview(frame, columns=list(range(len(fields)+1)), show="headings", height=15)
-        table.grid(row=3, column=0, columnspan=len(fields))
-        headers = ["ID"] + fields
+        table, refresh_table = self.init_paged_table(frame, ["ID"] + fields, select_callback, row=3,
+                                                     columnspan=len(fields))
+
+    def init_paged_table(self, frame, headers, select_page, row, columnspan):
+        # Shows PAGE_SIZE rows at a time. Pages are keyed by the last id of
+        # the previous page (select_page(after_id, limit) must order by id),
+        # so every page costs one small indexed query whatever the table size.
+        table = ttk.Treeview(frame, columns=list(range(len(headers))), show="headings", height=15)
+        table.grid(row=row, column=0, columnspan=columnspan)
         for i, header in enumerate(headers):
             table.heading(i, text=header)
             table.column(i, width=120)
 
+        page_starts = [0]
+        rows = []
+
         def refresh_table():
-            for row in table.get_children():
-                table.delete(row)
-            for row in select_callback():
-                table.insert("", "end", values=row)
+            # One extra row tells whether there is a next page
+            rows[:] = select_page(page_starts[-1], PAGE_SIZE + 1).fetchall()
+            if not rows and len(page_starts) > 1:
+                # The page emptied out, e.g. after deleting its rows
+                page_starts.pop()
+                return refresh_table()
+            table.delete(*table.get_children())
+            for values in rows[:PAGE_SIZE]:
+                table.insert("", "end", values=values)
+            page_label.config(text=f"Page {len(page_starts)}")
+            previous_button.state(["!disabled"] if len(page_starts) > 1 else ["disabled"])
+            next_button.state(["!disabled"] if len(rows) > PAGE_SIZE else ["disabled"])
+
+        def next_page():
+            if len(rows) > PAGE_SIZE:
+                page_starts.append(rows[PAGE_SIZE - 1][0])
+                refresh_table()
+
+        def previous_page():
+            if len(page_starts) > 1:
+                page_starts.pop()
+                refresh_table()
+
+        nav = ttk.Frame(frame)
+        nav.grid(row=row + 1, column=0, columnspan=columnspan, pady=5)
+        previous_button = ttk.Button(nav, text="< Previous", command=previous_page)
+        previous_button.pack(side=tk.LEFT, padx=5)
+        page_label = ttk.Label(nav)
+        page_label.pack(side=tk.LEFT, padx=5)
+        next_button = ttk.Button(nav, text="Next >", command=next_page)
+        next_button.pack(side=tk.LEFT, padx=5)
 
         refresh_table()
+        return table, refresh_table
 
 if __name__ == "__main__":
     root = tk.Tk()
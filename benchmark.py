@@ -0,0 +1,135 @@
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from generate import generate_database
+from solver import solve_database
+
+# Fixed benchmark cases: generate_database arguments, seeds included, so
+# that results stay comparable between runs.
+SUITE = {
+    "small": {"n_groups": 30, "seed": 1},
+    "medium": {"n_groups": 120, "seed": 2},
+    "tight": {"n_groups": 120, "tightness": 0.95, "seed": 3},
+    "labs": {"n_groups": 120, "lab_ratio": 0.5, "seed": 4},
+    "busy_teachers": {"n_groups": 120, "teacher_load": 8, "seed": 5},
+    "large": {"n_groups": 400, "seed": 6},
+    "huge": {"n_groups": 1000, "seed": 7},
+}
+QUICK = ["small", "medium", "tight", "labs", "busy_teachers"]
+
+
+def count_violations(db_path):
+    # Hard-constraint violations in the stored schedule: double-booked rooms,
+    # teachers and groups, rooms that are too small or not a required lab,
+    # and groups placed more often than their frequency.
+    conn = sqlite3.connect(db_path)
+    queries = [
+        "SELECT COUNT(*) - COUNT(DISTINCT room_id || ':' || timeslot_id) FROM group_schedule",
+        """SELECT COUNT(*) - COUNT(DISTINCT g.teacher_id || ':' || gs.timeslot_id)
+           FROM group_schedule gs JOIN groups g ON g.id = gs.group_id""",
+        "SELECT COUNT(*) - COUNT(DISTINCT group_id || ':' || timeslot_id) FROM group_schedule",
+        """SELECT COUNT(*) FROM group_schedule gs
+           JOIN groups g ON g.id = gs.group_id
+           JOIN rooms r ON r.id = gs.room_id
+           JOIN subjects s ON s.id = g.subject_id
+           WHERE g.student_count > r.capacity OR (s.requires_lab AND LOWER(TRIM(r.type)) != 'lab')""",
+        """SELECT COALESCE(SUM(placed - frecuency_count), 0) FROM (
+               SELECT COUNT(*) AS placed, g.frecuency_count FROM group_schedule gs
+               JOIN groups g ON g.id = gs.group_id GROUP BY gs.group_id
+           ) WHERE placed > frecuency_count""",
+    ]
+    violations = sum(conn.execute(query).fetchone()[0] for query in queries)
+    conn.close()
+    return violations
+
+
+def run_case(name, method, time_limit, workdir):
+    # Runs in a fresh process so that the peak memory is this case's own.
+    path = os.path.join(workdir, f"{name}.db")
+    generate_database(path, **SUITE[name])
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        summary = solve_database(path, method=method, cache=False, deadline=time.time() + time_limit)
+    wall_time = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    return {
+        "case": name,
+        "method": method,
+        "status": summary["status"],
+        "assigned": summary["assigned"],
+        "target": summary["target"],
+        "quality": summary["assigned"] / summary["target"] if summary["target"] else 1.0,
+        "violations": count_violations(path),
+        "wall_time": wall_time,
+        "peak_memory_kb": peak,
+        "nodes": summary["nodes"],
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solver on generated instances.")
+    parser.add_argument("cases", nargs="*", help=f"cases to run (default: {' '.join(QUICK)})")
+    parser.add_argument("--all", action="store_true", help="run every case, including the large ones")
+    parser.add_argument("--method", default="backtracking")
+    parser.add_argument("--time-limit", type=float, default=60.0, help="seconds per case")
+    parser.add_argument("--output", default="benchmarks.jsonl", help="history file results are appended to")
+    args = parser.parse_args(argv)
+
+    cases = list(SUITE) if args.all else args.cases or QUICK
+    unknown = [name for name in cases if name not in SUITE]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    previous = {(entry["case"], entry["method"]): entry for entry in load_history(args.output)}
+    commit = current_commit()
+    print(f"{'case':<15}{'status':<11}{'quality':>8}{'viol':>6}{'time (s)':>10}{'prev (s)':>10}{'peak MB':>9}{'nodes':>10}")
+    with tempfile.TemporaryDirectory() as workdir, open(args.output, "a") as history:
+        for name in cases:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(run_case, name, args.method, args.time_limit, workdir).result()
+            result["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            result["commit"] = commit
+            history.write(json.dumps(result) + "\n")
+            history.flush()
+
+            before = previous.get((name, args.method))
+            prev_time = f"{before['wall_time']:.2f}" if before else "-"
+            # ru_maxrss is in kilobytes on Linux.
+            peak = f"{result['peak_memory_kb'] / 1024:.1f}" if result["peak_memory_kb"] else "-"
+            print(
+                f"{name:<15}{result['status']:<11}{result['quality']:>8.3f}{result['violations']:>6}"
+                f"{result['wall_time']:>10.2f}{prev_time:>10}{peak:>9}{result['nodes']:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
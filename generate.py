@@ -0,0 +1,99 @@
+import argparse
+import math
+import os
+import random
+
+from schema import create_database
+
+ROOM_CAPACITIES = [20, 30, 40, 60]
+AUDITORIUM_CAPACITY = 120
+
+
+def generate_database(path, n_groups=60, teacher_load=4.0, tightness=0.7, lab_ratio=0.2, days=5, slots=6,
+                      frecuency=(1, 3), seed=0):
+    # Writes a random instance to path, replacing any existing file.
+    # teacher_load is the average number of groups per teacher, tightness the
+    # share of (room, timeslot) values the target meetings would fill, and
+    # lab_ratio the share of subjects (and about the share of rooms) that are
+    # labs. Every group fits at least one room of the right kind.
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+
+    n_slots = days * slots
+    frecuencies = [rng.randint(*frecuency) for _ in range(n_groups)]
+    n_teachers = max(1, math.ceil(n_groups / teacher_load))
+    n_rooms = max(1, math.ceil(sum(frecuencies) / (tightness * n_slots)))
+    # About two groups per subject, with enough subjects that no subject
+    # needs more groups than there are teachers.
+    n_subjects = max(1, math.ceil(n_groups / 2), math.ceil(n_groups / n_teachers))
+    lab_subjects = set(rng.sample(range(n_subjects), round(lab_ratio * n_subjects)))
+    n_labs = min(n_rooms, max(1 if lab_subjects else 0, round(lab_ratio * n_rooms)))
+
+    rooms = []
+    for r in range(n_rooms):
+        if r < n_labs:
+            rooms.append((f"Lab {r + 1}", "lab", rng.choice(ROOM_CAPACITIES)))
+        elif r == n_labs and n_rooms - n_labs > 3:
+            rooms.append((f"Auditorium {r + 1}", "auditorium", AUDITORIUM_CAPACITY))
+        else:
+            rooms.append((f"Room {r + 1}", "standard", rng.choice(ROOM_CAPACITIES)))
+    capacities = [capacity for _, _, capacity in rooms]
+    lab_capacities = [capacity for _, room_type, capacity in rooms if room_type == "lab"]
+
+    conn = create_database(path)
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO rooms (name, type, capacity) VALUES (?, ?, ?)", rooms)
+    cursor.executemany("INSERT INTO teachers (name) VALUES (?)", [(f"Teacher {t + 1}",) for t in range(n_teachers)])
+    cursor.executemany(
+        "INSERT INTO subjects (name, requires_lab) VALUES (?, ?)",
+        [(f"Subject {s + 1}", 1 if s in lab_subjects else 0) for s in range(n_subjects)],
+    )
+    cursor.executemany(
+        "INSERT INTO timeslots (day, slot) VALUES (?, ?)",
+        [(day, slot) for day in range(days) for slot in range(slots)],
+    )
+
+    pairs = set()
+    groups = []
+    for g in range(n_groups):
+        subject = g % n_subjects
+        teacher = rng.randrange(n_teachers)
+        while (subject, teacher) in pairs:
+            teacher = (teacher + 1) % n_teachers
+        pairs.add((subject, teacher))
+        # Sized to fit a random eligible room, so group sizes follow the
+        # room capacities.
+        fits = rng.choice(lab_capacities if subject in lab_subjects else capacities)
+        students = rng.randint(min(10, fits), fits)
+        groups.append((f"Group {g + 1}", subject + 1, teacher + 1, students, frecuencies[g]))
+    cursor.executemany(
+        "INSERT INTO groups (name, subject_id, teacher_id, student_count, frecuency_count) VALUES (?, ?, ?, ?, ?)",
+        groups,
+    )
+    conn.commit()
+    conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a random schedule database.")
+    parser.add_argument("path")
+    parser.add_argument("--groups", type=int, default=60)
+    parser.add_argument("--teacher-load", type=float, default=4.0, help="average groups per teacher")
+    parser.add_argument("--tightness", type=float, default=0.7, help="share of (room, timeslot) values to fill")
+    parser.add_argument("--lab-ratio", type=float, default=0.2)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--slots", type=int, default=6)
+    parser.add_argument("--min-frecuency", type=int, default=1)
+    parser.add_argument("--max-frecuency", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    generate_database(
+        args.path, n_groups=args.groups, teacher_load=args.teacher_load, tightness=args.tightness,
+        lab_ratio=args.lab_ratio, days=args.days, slots=args.slots,
+        frecuency=(args.min_frecuency, args.max_frecuency), seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
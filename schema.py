@@ -0,0 +1,187 @@
+import argparse
+import sqlite3
+
+# Schema of a schedule database as first shipped in cs68.db (version 1).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    capacity INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS teachers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS subjects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    requires_lab INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    subject_id INTEGER,
+    teacher_id INTEGER,
+    student_count INTEGER,
+    frecuency_count INTEGER,
+    FOREIGN KEY(subject_id) REFERENCES subjects(id),
+    FOREIGN KEY(teacher_id) REFERENCES teachers(id)
+);
+
+CREATE TABLE IF NOT EXISTS timeslots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    day INTEGER NOT NULL,
+    slot INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS group_schedule (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_id INTEGER,
+    room_id INTEGER,
+    timeslot_id INTEGER,
+    FOREIGN KEY(group_id) REFERENCES groups(id),
+    FOREIGN KEY(room_id) REFERENCES rooms(id),
+    FOREIGN KEY(timeslot_id) REFERENCES timeslots(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_group_schedule_group ON group_schedule(group_id);
+CREATE INDEX IF NOT EXISTS idx_group_schedule_room ON group_schedule(room_id);
+CREATE INDEX IF NOT EXISTS idx_group_schedule_timeslot ON group_schedule(timeslot_id);
+
+CREATE TRIGGER IF NOT EXISTS trg_no_empty_rooms
+BEFORE INSERT ON rooms
+WHEN NEW.name = '' OR NEW.type = '' OR NEW.capacity IS NULL
+BEGIN
+    SELECT RAISE(ABORT, 'Room fields must not be empty.');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_valid_room_type
+BEFORE INSERT ON rooms
+WHEN LOWER(NEW.type) NOT IN ('standard', 'lab', 'auditorium')
+BEGIN
+    SELECT RAISE(ABORT, 'Invalid room type. Must be standard, lab, or auditorium.');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_no_duplicate_rooms
+BEFORE INSERT ON rooms
+WHEN EXISTS (SELECT 1 FROM rooms WHERE name = NEW.name AND type = NEW.type AND capacity = NEW.capacity)
+BEGIN
+    SELECT RAISE(ABORT, 'Duplicate room entry.');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_no_empty_teacher
+BEFORE INSERT ON teachers
+WHEN NEW.name = ''
+BEGIN
+    SELECT RAISE(ABORT, 'Teacher name must not be empty.');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_no_duplicate_teacher
+BEFORE INSERT ON teachers
+WHEN EXISTS (SELECT 1 FROM teachers WHERE name = NEW.name)
+BEGIN
+    SELECT RAISE(ABORT, 'Duplicate teacher.');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_no_empty_subject
+BEFORE INSERT ON subjects
+WHEN NEW.name = ''
+BEGIN
+    SELECT RAISE(ABORT, 'Subject name must not be empty.');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_no_duplicate_subject
+BEFORE INSERT ON subjects
+WHEN EXISTS (SELECT 1 FROM subjects WHERE name = NEW.name AND requires_lab = NEW.requires_lab)
+BEGIN
+    SELECT RAISE(ABORT, 'Duplicate subject.');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_valid_frecuency_count
+BEFORE INSERT ON groups
+WHEN NEW.frecuency_count < 0
+BEGIN
+    SELECT RAISE(ABORT, 'Invalid frecuency count.');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_duplicate_group
+BEFORE INSERT ON groups
+WHEN EXISTS (
+    SELECT 1 FROM groups
+    WHERE subject_id = NEW.subject_id AND teacher_id = NEW.teacher_id
+)
+BEGIN
+    SELECT RAISE(ABORT, 'Duplicate group (same teacher and subject).');
+END;
+"""
+
+# Duplicate checks move from BEFORE INSERT triggers, which scanned the whole
+# table on every insert, to UNIQUE indexes on the same columns.
+UNIQUE_INDEXES = """
+DROP TRIGGER IF EXISTS trg_no_duplicate_rooms;
+DROP TRIGGER IF EXISTS trg_no_duplicate_teacher;
+DROP TRIGGER IF EXISTS trg_no_duplicate_subject;
+DROP TRIGGER IF EXISTS trg_duplicate_group;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rooms_unique ON rooms(name, type, capacity);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_teachers_unique ON teachers(name);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_subjects_unique ON subjects(name, requires_lab);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_groups_unique ON groups(subject_id, teacher_id);
+"""
+
+# Migration i brings a database from PRAGMA user_version i to i + 1. Only
+# ever append to this list; released migrations must not change.
+MIGRATIONS = [SCHEMA, UNIQUE_INDEXES]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    # Applies the pending migrations, each in its own transaction together
+    # with its version bump, and returns the resulting version. Databases
+    # made before versioning (version 0) already have the version 1 tables,
+    # which SCHEMA leaves alone.
+    version = schema_version(conn)
+    if version > len(MIGRATIONS):
+        raise ValueError(f"Database schema version {version} is newer than this program ({len(MIGRATIONS)}).")
+    conn.commit()
+    for target in range(version + 1, len(MIGRATIONS) + 1):
+        try:
+            conn.executescript(f"BEGIN;\n{MIGRATIONS[target - 1]}\nPRAGMA user_version = {target};\nCOMMIT;")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            raise sqlite3.DatabaseError(f"Migration to schema version {target} failed: {e}") from e
+    return len(MIGRATIONS)
+
+
+def create_schema(conn):
+    migrate(conn)
+
+
+def create_database(path):
+    conn = sqlite3.connect(path)
+    create_schema(conn)
+    return conn
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upgrade schedule databases to the current schema.")
+    parser.add_argument("databases", nargs="+")
+    args = parser.parse_args(argv)
+    for path in args.databases:
+        conn = sqlite3.connect(path)
+        before = schema_version(conn)
+        after = migrate(conn)
+        conn.close()
+        print(f"{path}: schema version {before} -> {after}")
+
+
+if __name__ == "__main__":
+    main()
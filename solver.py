@@ -1,8 +1,312 @@
 import sqlite3
+import random
+import hashlib
+import json
+import time
+import argparse
+import contextlib
+import cProfile
+import glob
+import os
+import sys
 from collections import defaultdict
-import copy
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+import multiprocessing
 
-def run_solver(db_path):
+
+class SearchStopped(Exception):
+    pass
+
+
+class SearchRestart(Exception):
+    pass
+
+
+class SolveBudget:
+    # Event-like stop token combining a caller's cancellation event with a
+    # deadline (a time.time() value); engines only call is_set(). triggered
+    # records whether an engine was actually told to stop.
+    def __init__(self, stop=None, deadline=None):
+        self.stop = stop
+        self.deadline = deadline
+        self.triggered = False
+
+    def is_set(self):
+        if (self.stop is not None and self.stop.is_set()) or (self.deadline is not None and time.time() >= self.deadline):
+            self.triggered = True
+        return self.triggered
+
+
+class SolverStats:
+    # Counters and phase timings (seconds) collected while solving. Engines
+    # add the counters that apply to them when they finish; phase() times a
+    # block and passes (phase, seconds) to hook, if any. to_dict() is
+    # JSON-ready.
+    def __init__(self, hook=None):
+        self.counts = defaultdict(int)
+        self.timings = defaultdict(float)
+        self.hook = hook
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def add_time(self, phase, seconds):
+        self.timings[phase] += seconds
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] += elapsed
+            if self.hook is not None:
+                self.hook(name, elapsed)
+
+    def merge(self, data):
+        for name, n in data["counts"].items():
+            self.counts[name] += n
+        for phase, seconds in data["timings"].items():
+            self.timings[phase] += seconds
+
+    def to_dict(self):
+        return {"counts": dict(self.counts), "timings": dict(self.timings)}
+
+
+def luby(i):
+    # i-th term (from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ...
+    k = 1
+    while (1 << k) - 1 < i + 1:
+        k += 1
+    while True:
+        if i + 1 == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i + 1:
+            k += 1
+
+
+def restart_cutoff(strategy, base, restart):
+    if strategy == "luby":
+        return base * luby(restart)
+    if strategy == "geometric":
+        return int(base * 1.5 ** restart)
+    raise ValueError(f"Unknown restart strategy: {strategy}")
+
+
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class IndexedHeap:
+    # Binary min-heap over the items 0..n-1 that tracks each item's position,
+    # so a key can be changed or an item removed in O(log n).
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.heap = list(range(len(self.keys)))
+        self.position = list(range(len(self.keys)))
+        for i in reversed(range(len(self.heap) // 2)):
+            self._sift_down(i)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return self.position[item] is not None
+
+    def peek(self):
+        return self.heap[0] if self.heap else None
+
+    def push(self, item, key):
+        self.keys[item] = key
+        self.position[item] = len(self.heap)
+        self.heap.append(item)
+        self._sift_up(len(self.heap) - 1)
+
+    def remove(self, item):
+        i = self.position[item]
+        last = self.heap.pop()
+        self.position[item] = None
+        if last != item:
+            self.heap[i] = last
+            self.position[last] = i
+            self._sift_up(i)
+            self._sift_down(self.position[last])
+
+    def update(self, item, key):
+        old = self.keys[item]
+        self.keys[item] = key
+        if key < old:
+            self._sift_up(self.position[item])
+        elif key > old:
+            self._sift_down(self.position[item])
+
+    def _swap(self, i, j):
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.position[heap[i]] = i
+        self.position[heap[j]] = j
+
+    def _sift_up(self, i):
+        keys, heap = self.keys, self.heap
+        while i > 0:
+            parent = (i - 1) // 2
+            if keys[heap[i]] >= keys[heap[parent]]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i):
+        keys, heap = self.keys, self.heap
+        n = len(heap)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and keys[heap[child]] < keys[heap[smallest]]:
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+
+class Instance:
+    # Rooms, timeslots, teachers and groups are remapped to dense indices.
+    # A value is the integer room * n_slots + slot and a domain is a bitset
+    # over values, so pruning and size checks are plain int operations.
+    def __init__(self, groups, rooms, timeslots, subject_lab_map):
+        timeslot_ordered = sorted(timeslots, key=lambda x: (x[2], x[1]))
+        self.timeslot_ids = [t[0] for t in timeslot_ordered]
+        self.timeslot_index = {tid: i for i, tid in enumerate(self.timeslot_ids)}
+        self.n_slots = len(self.timeslot_ids)
+
+        self.room_ids = [r[0] for r in rooms]
+        self.room_index = {rid: i for i, rid in enumerate(self.room_ids)}
+        self.room_names = [r[1] for r in rooms]
+        self.room_type = [r[2].strip().lower() for r in rooms]
+        self.room_capacity = [r[3] for r in rooms]
+        self.n_rooms = len(self.room_ids)
+        # Rooms with the same type and capacity are interchangeable.
+        classes = {}
+        self.room_class = [classes.setdefault((t, c), len(classes)) for t, c in zip(self.room_type, self.room_capacity)]
+
+        self.group_ids = [g[0] for g in groups]
+        self.group_index = {gid: i for i, gid in enumerate(self.group_ids)}
+        self.group_subject = [g[1] for g in groups]
+        self.group_students = [g[3] for g in groups]
+        self.group_frecuency = [g[4] for g in groups]
+        self.group_requires_lab = [subject_lab_map.get(g[1], 0) for g in groups]
+        self.n_groups = len(self.group_ids)
+
+        self.teacher_ids = list(dict.fromkeys(g[2] for g in groups))
+        self.teacher_index = {tid: i for i, tid in enumerate(self.teacher_ids)}
+        self.group_teacher = [self.teacher_index[g[2]] for g in groups]
+        self.teacher_groups = [[] for _ in self.teacher_ids]
+        for g, t in enumerate(self.group_teacher):
+            self.teacher_groups[t].append(g)
+
+        self.slot_row = (1 << self.n_slots) - 1
+        self.room_masks = [self.slot_row << (r * self.n_slots) for r in range(self.n_rooms)]
+        self.slot_masks = [
+            sum(1 << (r * self.n_slots + s) for r in range(self.n_rooms))
+            for s in range(self.n_slots)
+        ]
+        # slots_before[s]: every value whose timeslot rank is below s.
+        self.slots_before = [0]
+        for mask in self.slot_masks:
+            self.slots_before.append(self.slots_before[-1] | mask)
+
+        self.group_domains = []
+        for g in range(self.n_groups):
+            domain = 0
+            for r in range(self.n_rooms):
+                if self.group_students[g] > self.room_capacity[r]:
+                    continue
+                if self.group_requires_lab[g] and self.room_type[r] != "lab":
+                    continue
+                domain |= self.room_masks[r]
+            self.group_domains.append(domain)
+
+    def value(self, room, slot):
+        return room * self.n_slots + slot
+
+    def room_of(self, value):
+        return value // self.n_slots
+
+    def slot_of(self, value):
+        return value % self.n_slots
+
+    def slots_of(self, domain):
+        # Timeslots used by any value of the domain, as a bitset over slots.
+        slots = 0
+        while domain:
+            slots |= domain & self.slot_row
+            domain >>= self.n_slots
+        return slots
+
+    def to_ids(self, value):
+        return self.room_ids[value // self.n_slots], self.timeslot_ids[value % self.n_slots]
+
+    def fingerprint(self):
+        # Hash of everything the solver reads, independent of row order.
+        data = {
+            "groups": sorted(zip(
+                self.group_ids, self.group_subject, [self.teacher_ids[t] for t in self.group_teacher],
+                self.group_students, self.group_frecuency, self.group_requires_lab,
+            )),
+            "rooms": sorted(zip(self.room_ids, self.room_type, self.room_capacity)),
+            "timeslots": self.timeslot_ids,
+        }
+        return hashlib.sha256(json.dumps(data).encode()).hexdigest()
+
+
+class NogoodStore:
+    # Learned nogoods: sets of ((group, occurrence), value) literals that no
+    # complete schedule can hold together, each kept with the frequencies it
+    # was learned under. A nogood stays valid for frequencies that are at
+    # least as large for every group, since extra meetings only add
+    # constraints, so one store can be shared across relaxation retries.
+    # A nogood learned around fixed placements also assumes those, and only
+    # applies to searches that fix them too.
+    def __init__(self, max_size=3, capacity=10000):
+        self.max_size = max_size
+        self.capacity = capacity
+        self.entries = []
+        self.seen = set()
+
+    def add(self, literals, frecuencies, fixed=None):
+        literals = frozenset(literals)
+        context = frozenset((fixed or {}).items())
+        if (literals, context) in self.seen or len(self.entries) >= self.capacity:
+            return
+        self.seen.add((literals, context))
+        self.entries.append((literals, tuple(frecuencies), context))
+
+    def valid_for(self, frecuencies, fixed=None):
+        fixed = fixed or {}
+        return [
+            literals for literals, learned, context in self.entries
+            if all(f >= l for f, l in zip(frecuencies, learned))
+            and all(fixed.get(key) == value for key, value in context)
+        ]
+
+
+def learning_options(options, method="backtracking"):
+    # Turns the learn_nogoods option into backjumping with one NogoodStore,
+    # shared by every solve these options are passed to. Only backtracking
+    # learns; other engines just drop the option.
+    if options.pop("learn_nogoods", False) and method == "backtracking":
+        options["backjumping"] = True
+        options["nogoods"] = NogoodStore()
+    return options
+
+
+def load_instance(db_path):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
@@ -19,195 +323,1448 @@ def run_solver(db_path):
     subject_lab_map = {row[0]: row[1] for row in cursor.fetchall()}
     conn.close()
 
-    group_data = {
-        g[0]: {
-            "subject_id": g[1],
-            "teacher_id": g[2],
-            "student_count": g[3],
-            "frecuency_count": g[4],
-            "requires_lab": subject_lab_map.get(g[1], 0)
-        } for g in groups
-    }
+    return Instance(groups, rooms, timeslots, subject_lab_map)
 
-    room_data = {
-        r[0]: {
-            "name": r[1],
-            "type": r[2].strip().lower(),
-            "capacity": r[3]
-        } for r in rooms
-    }
 
-    timeslot_ordered = sorted(timeslots, key=lambda x: (x[2], x[1]))
-    timeslot_ids = [t[0] for t in timeslot_ordered]
+def search_steps(instance, frecuencies, hints=None, propagation="root", symmetry=True, room_symmetry=True,
+                 restarts=None, restart_base=100, weighting=False, seed=0, backjumping=False, nogoods=None,
+                 value_order="lcv", resume=None, fixed=None, stats=None):
+    # Backtracking search for the given per-group frequencies, as a
+    # generator. It regularly yields a function that returns a picklable
+    # snapshot of the search, so the caller can pause (stop iterating),
+    # resume (iterate again) or save the snapshot and later pass it back as
+    # resume to continue from the same branch. It finally returns the
+    # complete assignment {(group, occurrence): value} or None, together with
+    # the largest partial assignment reached. hints maps (group, occurrence)
+    # to a value that is tried first when still in the domain. propagation is
+    # "none", "root" (counting checks before search) or "node" (also singleton
+    # propagation and per-teacher counting checks after every assignment).
+    # symmetry forces the occurrences of a group into increasing timeslots;
+    # room_symmetry tries only one free room per class of identical rooms.
+    # value_order is "lcv" (least-constraining value first) or "slot"
+    # (earliest timeslot first). restarts ("luby" or "geometric") restarts
+    # the search after restart_base * cutoff(i) backtracks with freshly
+    # seeded variable tie-breaking; weighting selects variables by domain size divided by how
+    # often their domain was wiped out (dom/wdeg). backjumping enables
+    # conflict-directed backjumping; nogoods is a NogoodStore that learned
+    # nogoods are read from and added to (only with backjumping). fixed maps
+    # (group, occurrence) to a value that is kept: those occurrences are not
+    # searched, their room and teacher usage is removed from the other
+    # domains up front, and their groups are left out of symmetry breaking.
+    # stats is a SolverStats that receives the search counters and the time
+    # spent building domains, ordering values and propagating.
+    n_slots = instance.n_slots
+    group_teacher = instance.group_teacher
+    slot_masks = instance.slot_masks
+    hints = hints or {}
+    setup_start = time.perf_counter()
+    counts = defaultdict(int)
+    timings = defaultdict(float)
+    fixed = {key: value for key, value in (fixed or {}).items() if key[1] < frecuencies[key[0]]}
+    fixed_groups = {group for group, _ in fixed}
+    fixed_values = 0
+    fixed_teacher_slots = defaultdict(int)
+    for (group, _), value in fixed.items():
+        fixed_values |= 1 << value
+        fixed_teacher_slots[group_teacher[group]] |= slot_masks[value % n_slots]
 
-    teacher_to_groups = defaultdict(set)
-    for gid, g in group_data.items():
-        teacher_to_groups[g["teacher_id"]].add(gid)
+    csp_variables = [
+        (group, i) for group, freq in enumerate(frecuencies) for i in range(freq) if (group, i) not in fixed
+    ]
+    var_group = [group for group, _ in csp_variables]
+    domains = []
+    empty_domain_report_this_iter = []
+    all_values = instance.slots_before[n_slots]
+    for group, i in csp_variables:
+        domain = instance.group_domains[group] & ~fixed_values & ~fixed_teacher_slots[group_teacher[group]]
+        if symmetry and group not in fixed_groups:
+            # Occurrence i of f has at least i occurrences before it and
+            # f - 1 - i after it.
+            later = frecuencies[group] - 1 - i
+            domain &= ~instance.slots_before[i] & instance.slots_before[max(n_slots - later, 0)]
+        if not domain:
+            empty_domain_report_this_iter.append(f"Variable {(group, i)} has an empty initial domain.")
+        domains.append(domain)
 
-    original_frecuencies = {gid: data["frecuency_count"] for gid, data in group_data.items()}
-    current_frecuencies = copy.deepcopy(original_frecuencies)
-    best_solution_found = None
+    if empty_domain_report_this_iter:
+        print("WARNING: Some variables have empty initial domains based on room/lab constraints.")
 
-    while True:
-        print(f"\nAttempting to solve with target frequencies: {current_frecuencies}")
-        csp_variables = [(group_id, i) for group_id, freq in current_frecuencies.items() for i in range(freq)]
-        if not csp_variables:
-            if best_solution_found:
-                print("All frequencies reduced to zero, but a solution was found at a higher frequency. Proceeding to save it.")
-                break
-            else:
-                return "No feasible schedule can be found, even after reducing all group frequencies to zero."
-
-        domains = {}
-        empty_domain_report_this_iter = []
-        for var_tuple in csp_variables:
-            original_group_id, _ = var_tuple
-            g = group_data[original_group_id]
-            domain = []
-            for room_id, room in room_data.items():
-                if g["student_count"] > room["capacity"]:
-                    continue
-                if g["requires_lab"] and room["type"] != "lab":
+    # Variables that can be pruned by an assignment: same teacher (which
+    # includes the other occurrences of the group) or same room.
+    teacher_vars = defaultdict(list)
+    group_vars = defaultdict(list)
+    room_vars = [[] for _ in range(instance.n_rooms)]
+    for var, group in enumerate(var_group):
+        teacher_vars[group_teacher[group]].append(var)
+        group_vars[group].append(var)
+        for room in range(instance.n_rooms):
+            if domains[var] & instance.room_masks[room]:
+                room_vars[room].append(var)
+
+    assignment = {}
+    # Occupancy indexes kept in step with the assignment:
+    # (room, timeslot) -> occupant, teacher -> busy slots, group -> busy slots.
+    room_slot_occupant = [None] * (instance.n_rooms * n_slots)
+    teacher_busy = [0] * len(instance.teacher_ids)
+    group_busy = [0] * instance.n_groups
+    # Undo log of (var, removed_bits); forward_check returns a mark into it.
+    # pruners[var] holds, in step with the log, the assigned variable that
+    # caused each removal from var's domain (None when it came from
+    # singleton propagation and has no single culprit).
+    trail = []
+    pruners = [[] for _ in csp_variables]
+    # Conflict set of the last forward_check failure.
+    failure = set()
+    # Support counts over unassigned variables, kept up to date as domains
+    # are pruned and restored: per value, and per (teacher, timeslot).
+    value_support = [0] * (instance.n_rooms * n_slots)
+    teacher_slot_support = [0] * (len(instance.teacher_ids) * n_slots)
+
+    def count_support(var, bits, delta):
+        teacher_base = group_teacher[var_group[var]] * n_slots
+        for value in iter_bits(bits):
+            value_support[value] += delta
+            teacher_slot_support[teacher_base + value % n_slots] += delta
+
+    # Initial counts: occurrences of a group, and groups fitting the same
+    # rooms, share one base domain, so each distinct base is counted once
+    # times its number of variables; the symmetry and fixed-teacher
+    # restrictions are then taken off each variable.
+    base_of = [instance.group_domains[group] & ~fixed_values for group in var_group]
+    shared = defaultdict(int)
+    for var, base in enumerate(base_of):
+        shared[(group_teacher[var_group[var]], base)] += 1
+    base_count = defaultdict(int)
+    for (teacher, base), m in shared.items():
+        base_count[base] += m
+        for slot in range(n_slots):
+            teacher_slot_support[teacher * n_slots + slot] += m * (base & slot_masks[slot]).bit_count()
+    for base, m in base_count.items():
+        for value in iter_bits(base):
+            value_support[value] += m
+    for var, domain in enumerate(domains):
+        count_support(var, base_of[var] & ~domain, -1)
+
+    # MRV queue over unassigned variables keyed on (domain size / weight,
+    # -teacher load, tie-break); forward checking and restores re-key the
+    # touched variables.
+    teacher_load = [-len(instance.teacher_groups[group_teacher[group]]) for group in var_group]
+    weight = [1] * len(csp_variables)
+    rng = random.Random(seed)
+    tie_break = list(range(len(csp_variables)))
+
+    def mrv_key(var):
+        return (domains[var].bit_count() / weight[var], teacher_load[var], tie_break[var])
+
+    unassigned_queue = IndexedHeap(mrv_key(var) for var in range(len(csp_variables)))
+
+    def is_valid(var, value):
+        group = var_group[var]
+        slot_bit = 1 << (value % n_slots)
+        if room_slot_occupant[value] is not None:
+            return False
+        if teacher_busy[group_teacher[group]] & slot_bit:
+            return False
+        return not group_busy[group] & slot_bit
+
+    def assign(var, value):
+        group = var_group[var]
+        slot_bit = 1 << (value % n_slots)
+        assignment[var] = value
+        count_support(var, domains[var], -1)
+        unassigned_queue.remove(var)
+        room_slot_occupant[value] = var
+        teacher_busy[group_teacher[group]] |= slot_bit
+        group_busy[group] |= slot_bit
+
+    def unassign(var):
+        group = var_group[var]
+        value = assignment.pop(var)
+        count_support(var, domains[var], 1)
+        unassigned_queue.push(var, mrv_key(var))
+        slot_bit = 1 << (value % n_slots)
+        room_slot_occupant[value] = None
+        teacher_busy[group_teacher[group]] &= ~slot_bit
+        group_busy[group] &= ~slot_bit
+
+    def culprits(var_pruners):
+        if None in var_pruners:
+            return set(assignment)
+        return set(var_pruners)
+
+    def prune(domains, other_var, mask, mark, singletons=None, culprit=None):
+        nonlocal failure
+        removed = domains[other_var] & mask
+        if not removed:
+            return True
+        domains[other_var] ^= removed
+        counts["pruned"] += removed.bit_count()
+        trail.append((other_var, removed))
+        pruners[other_var].append(culprit)
+        count_support(other_var, removed, -1)
+        unassigned_queue.update(other_var, mrv_key(other_var))
+        if domains[other_var]:
+            if singletons is not None and domains[other_var].bit_count() == 1:
+                singletons.append(other_var)
+            return True
+        counts["wipeouts"] += 1
+        if weighting:
+            weight[other_var] += 1
+        failure = culprits(pruners[other_var])
+        restore_domains(domains, mark)
+        return False
+
+    def prune_conflicts(var, value, mark, singletons=None, culprit=None):
+        slot_mask = slot_masks[value % n_slots]
+        for other_var in teacher_vars[group_teacher[var_group[var]]]:
+            if other_var == var or other_var in assignment:
+                continue
+            if not prune(domains, other_var, slot_mask, mark, singletons, culprit):
+                return False
+        value_bit = 1 << value
+        for other_var in room_vars[value // n_slots]:
+            if other_var == var or other_var in assignment:
+                continue
+            if not prune(domains, other_var, value_bit, mark, singletons, culprit):
+                return False
+        if symmetry and var_group[var] not in fixed_groups:
+            slot = value % n_slots
+            occurrence = csp_variables[var][1]
+            earlier = all_values & ~instance.slots_before[slot]
+            later = instance.slots_before[slot + 1]
+            for other_var in group_vars[var_group[var]]:
+                if other_var == var or other_var in assignment:
                     continue
-                for ts in timeslot_ordered:
-                    domain.append((room_id, ts[0]))
-            if not domain:
-                empty_domain_report_this_iter.append(f"Variable {var_tuple} has an empty initial domain.")
-            domains[var_tuple] = domain
-
-        if empty_domain_report_this_iter:
-            print("WARNING: Some variables have empty initial domains based on room/lab constraints.")
-
-        assignment = {}
-
-        def is_valid(group_var, room_id, timeslot_id, partial_assignment):
-            original_group_id, _ = group_var
-            teacher_id = group_data[original_group_id]["teacher_id"]
-            assigned_ts = {
-                t_id for (g_id, _), (_, t_id) in partial_assignment.items()
-                if g_id == original_group_id
-            }
-            for (other_gid, _), (r_id, t_id) in partial_assignment.items():
-                if t_id == timeslot_id and r_id == room_id:
-                    return False
-                if group_data[other_gid]["teacher_id"] == teacher_id and t_id == timeslot_id:
+                mask = earlier if csp_variables[other_var][1] < occurrence else later
+                if not prune(domains, other_var, mask, mark, singletons, culprit):
                     return False
-                if other_gid == original_group_id and t_id == timeslot_id:
-                    return False
-            return timeslot_id not in assigned_ts
-
-        def forward_check(domains, var, value, assignment):
-            room_id, timeslot_id = value
-            pruned = {}
-            temp_domains = copy.deepcopy(domains)
-            for other_var in temp_domains:
-                if other_var in assignment or other_var == var:
+        return True
+
+    def propagate_singletons(singletons, mark):
+        # A variable left with a single value behaves as if assigned: its
+        # conflicts are removed from every other domain, which may in turn
+        # leave more singletons.
+        while singletons:
+            var = singletons.pop()
+            domain = domains[var]
+            if var in assignment or domain.bit_count() != 1:
+                continue
+            if not prune_conflicts(var, domain.bit_length() - 1, mark, singletons):
+                return False
+        return True
+
+    def fits_distinct_slots(variables):
+        # Pigeonhole check: unassigned variables that must meet in pairwise
+        # different timeslots need at least that many slots between them.
+        count = 0
+        slots = 0
+        for var in variables:
+            if var not in assignment:
+                count += 1
+                slots |= instance.slots_of(domains[var])
+        return slots.bit_count() >= count
+
+    def fits_distinct_values(variables):
+        count = 0
+        values = 0
+        for var in variables:
+            if var not in assignment:
+                count += 1
+                values |= domains[var]
+        return values.bit_count() >= count
+
+    def teacher_consistent(teacher):
+        if not fits_distinct_slots(teacher_vars[teacher]):
+            return False
+        return all(fits_distinct_slots(group_vars[g]) for g in instance.teacher_groups[teacher])
+
+    def root_consistent():
+        if not all(teacher_consistent(teacher) for teacher in list(teacher_vars)):
+            return False
+        # Room classes: the variables restricted to a set of rooms (for
+        # example labs only, or rooms above a capacity) need that many
+        # distinct (room, timeslot) values inside it.
+        for base in set(instance.group_domains[g] for g in group_vars):
+            if not fits_distinct_values(v for v in range(len(csp_variables)) if domains[v] & ~base == 0):
+                return False
+        return True
+
+    def forward_check(domains, var, value, assignment):
+        start = time.perf_counter()
+        mark = propagate_assignment(var, value)
+        timings["propagation"] += time.perf_counter() - start
+        return mark
+
+    def propagate_assignment(var, value):
+        nonlocal failure
+        mark = len(trail)
+        if propagation != "node":
+            return mark if prune_conflicts(var, value, mark, culprit=var) else None
+        singletons = []
+        if not (prune_conflicts(var, value, mark, singletons, var)
+                and propagate_singletons(singletons, mark)):
+            return None
+        if teacher_consistent(group_teacher[var_group[var]]):
+            return mark
+        failure = set(assignment)
+        restore_domains(domains, mark)
+        return None
+
+    def restore_domains(domains, mark):
+        while len(trail) > mark:
+            other_var, removed = trail.pop()
+            pruners[other_var].pop()
+            domains[other_var] |= removed
+            count_support(other_var, removed, 1)
+            if other_var in unassigned_queue:
+                unassigned_queue.update(other_var, mrv_key(other_var))
+
+    def select_unassigned_group(domains, assignment):
+        return unassigned_queue.peek()
+
+    def order_domain_values(var, domains, assignment):
+        start = time.perf_counter()
+        ordered = rank_domain_values(var)
+        timings["ordering"] += time.perf_counter() - start
+        return ordered
+
+    def rank_domain_values(var):
+        # Least-constraining value first: other unassigned variables that
+        # could take the same (room, timeslot), plus values of the same
+        # teacher's variables at that timeslot. Ties go to the earlier slot.
+        domain = domains[var]
+        teacher_base = group_teacher[var_group[var]] * n_slots
+        value_conflicts = []
+        for value in iter_bits(domain):
+            slot = value % n_slots
+            if value_order == "slot":
+                conflicts = 0
+            else:
+                own = (domain & slot_masks[slot]).bit_count()
+                conflicts = value_support[value] - 1 + teacher_slot_support[teacher_base + slot] - own
+            value_conflicts.append((conflicts, slot, value))
+        value_conflicts.sort()
+        ordered = [v for _, _, v in value_conflicts]
+        hint = hints.get(csp_variables[var])
+        if hint is not None and domain >> hint & 1:
+            ordered.remove(hint)
+            ordered.insert(0, hint)
+        if room_symmetry:
+            # Every value left in a domain is unoccupied, so two rooms of the
+            # same class at the same timeslot lead to mirrored subtrees.
+            seen = set()
+            unique = []
+            for value in ordered:
+                key = (instance.room_class[value // n_slots], value % n_slots)
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(value)
+            ordered = unique
+        return ordered
+
+    # Learned nogoods as tuples of (var, value), indexed by each literal.
+    nogood_index = defaultdict(list)
+    var_index = {v: i for i, v in enumerate(csp_variables)}
+
+    def add_nogood(literals):
+        for literal in literals:
+            nogood_index[literal].append(literals)
+
+    if nogoods is not None:
+        for literals in nogoods.valid_for(frecuencies, fixed):
+            # Literals on fixed occurrences either hold already or make the
+            # nogood irrelevant.
+            if any(key in fixed and fixed[key] != value for key, value in literals):
+                continue
+            add_nogood(tuple((var_index[key], value) for key, value in literals if key not in fixed))
+
+    def violated_nogood(var, value):
+        # Past variables that, together with var = value, complete a nogood.
+        for literals in nogood_index.get((var, value), ()):
+            if all(assignment.get(other) == other_value for other, other_value in literals if other != var):
+                return {other for other, _ in literals if other != var}
+        return None
+
+    def learn(conflict):
+        if nogoods is None or not 0 < len(conflict) <= nogoods.max_size:
+            return
+        literals = tuple((v, assignment[v]) for v in conflict)
+        counts["nogoods_learned"] += 1
+        add_nogood(literals)
+        nogoods.add([(csp_variables[v], value) for v, value in literals], frecuencies, fixed)
+
+    best_partial = {}
+    nodes = 0
+    backtracks = 0
+    restart = 0
+    cutoff = None
+    # Explicit search stack, one frame per assigned variable plus the one
+    # being tried: [var, values left to try, conflict set, trail mark], where
+    # the mark is None while the variable holds no value.
+    stack = []
+
+    def snapshot():
+        partial = best_partial
+        if len(assignment) > len(partial):
+            partial = {csp_variables[v]: value for v, value in assignment.items()}
+        return {
+            "frecuencies": list(frecuencies),
+            "frames": [
+                (csp_variables[var], assignment[var], list(values), [csp_variables[v] for v in conflict])
+                for var, values, conflict, mark in stack if mark is not None
+            ],
+            "best_partial": {**fixed, **partial},
+            "nodes": nodes,
+            "restart": restart,
+            "tie_break": list(tie_break),
+            "weight": list(weight),
+        }
+
+    def replay(state):
+        # Rebuilds the branch of a snapshot taken with the same instance,
+        # frequencies and options.
+        nonlocal best_partial, nodes, restart
+        if list(state["frecuencies"]) != list(frecuencies):
+            raise ValueError("Snapshot was taken with different frequencies.")
+        tie_break[:] = state["tie_break"]
+        weight[:] = state["weight"]
+        for var in range(len(csp_variables)):
+            unassigned_queue.update(var, mrv_key(var))
+        for key, value, values, conflict in state["frames"]:
+            var = var_index[key]
+            if var in assignment or not domains[var] >> value & 1:
+                raise ValueError(f"Snapshot assigns {key} a value that is no longer possible.")
+            assign(var, value)
+            mark = forward_check(domains, var, value, assignment)
+            if mark is None:
+                raise ValueError(f"Snapshot assigns {key} a value that is no longer possible.")
+            stack.append([var, list(values), {var_index[v] for v in conflict}, mark])
+        best_partial = {key: value for key, value in state["best_partial"].items() if key not in fixed}
+        nodes = state["nodes"]
+        restart = state["restart"]
+
+    def search():
+        # Depth-first search on the explicit stack. Returns True once the
+        # assignment is complete, or the conflict set of the root failure:
+        # the past variables whose values explain a failure. A frame outside
+        # the conflict set of its child cannot fix the failure by changing
+        # its own value, so with backjumping it is popped unchanged. Yields
+        # every 32 nodes.
+        nonlocal best_partial, nodes, backtracks
+        descend = True
+        result = None
+        while True:
+            if descend:
+                if len(assignment) == len(csp_variables):
+                    return True
+                nodes += 1
+                if nodes % 32 == 0:
+                    yield snapshot
+                var = select_unassigned_group(domains, assignment)
+                stack.append([var, order_domain_values(var, domains, assignment)[::-1], set(), None])
+                descend = False
+            frame = stack[-1]
+            var, values, conflict, mark = frame
+            if mark is not None:
+                # The child failed with conflict set result.
+                frame[3] = None
+                restore_domains(domains, mark)
+                unassign(var)
+                if backjumping and var not in result:
+                    stack.pop()
+                    if not stack:
+                        return result
                     continue
-                other_gid, _ = other_var
-                new_domain = []
-                for val in temp_domains[other_var]:
-                    if val[0] == room_id and val[1] == timeslot_id:
-                        continue
-                    if group_data[other_gid]["teacher_id"] == group_data[var[0]]["teacher_id"] and val[1] == timeslot_id:
-                        continue
-                    if other_gid == var[0] and val[1] == timeslot_id:
+                conflict |= result
+            while values:
+                value = values.pop()
+                if not is_valid(var, value):
+                    counts["rejected"] += 1
+                    conflict |= set(assignment)
+                    continue
+                if nogood_index:
+                    reason = violated_nogood(var, value)
+                    if reason is not None:
+                        counts["nogood_rejections"] += 1
+                        conflict |= reason
                         continue
-                    new_domain.append(val)
-                if not new_domain:
-                    return None
-                if new_domain != temp_domains[other_var]:
-                    pruned[other_var] = temp_domains[other_var]
-                    temp_domains[other_var] = new_domain
-            for k in pruned:
-                domains[k] = temp_domains[k]
-            return pruned
-
-        def restore_domains(domains, pruned):
-            for k in pruned:
-                domains[k] = pruned[k]
-
-        def select_unassigned_group(domains, assignment):
-            unassigned = [v for v in csp_variables if v not in assignment]
-            if not unassigned:
+                assign(var, value)
+                mark = forward_check(domains, var, value, assignment)
+                if mark is not None:
+                    frame[3] = mark
+                    descend = True
+                    break
+                conflict |= failure
+                unassign(var)
+            if descend:
+                continue
+            stack.pop()
+            conflict.discard(var)
+            conflict |= culprits(pruners[var])
+            if len(assignment) > len(best_partial):
+                best_partial = {csp_variables[v]: value for v, value in assignment.items()}
+            backtracks += 1
+            counts["backtracks"] += 1
+            if cutoff is not None and backtracks >= cutoff:
+                raise SearchRestart
+            if backjumping:
+                learn(conflict)
+            result = conflict
+            if not stack:
+                return result
+
+    timings["domains"] += time.perf_counter() - setup_start
+    # Lets the caller check its stop token before any search work.
+    yield snapshot
+    start = time.perf_counter()
+    consistent = propagation == "none" or root_consistent()
+    timings["propagation"] += time.perf_counter() - start
+    if not consistent:
+        print("Counting checks prove these frequencies infeasible before search.")
+        if stats is not None:
+            stats.merge({"counts": counts, "timings": timings})
+        return None, dict(fixed)
+
+    if resume is not None:
+        replay(resume)
+    try:
+        while True:
+            backtracks = 0
+            cutoff = restart_cutoff(restarts, restart_base, restart) if restarts else None
+            try:
+                if (yield from search()) is True:
+                    solution = {csp_variables[var]: value for var, value in assignment.items()}
+                    solution.update(fixed)
+                    return solution, solution
+                return None, {**fixed, **best_partial}
+            except SearchRestart:
+                while stack:
+                    var, _, _, mark = stack.pop()
+                    if mark is not None:
+                        restore_domains(domains, mark)
+                        unassign(var)
+                restart += 1
+                counts["restarts"] += 1
+                rng.shuffle(tie_break)
+                unassigned_queue = IndexedHeap(mrv_key(var) for var in range(len(csp_variables)))
+    finally:
+        if stats is not None:
+            counts["nodes"] += nodes
+            stats.merge({"counts": counts, "timings": timings})
+
+
+def solve(instance, frecuencies, stop=None, progress=None, **options):
+    # Runs search_steps to the end. stop is an Event-like object; once set,
+    # the search returns its best partial assignment. progress is called as
+    # progress(nodes, depth, best partial size) at most every 0.1 seconds.
+    steps = search_steps(instance, frecuencies, **options)
+    reported = 0
+    try:
+        while True:
+            snapshot = next(steps)
+            if stop is not None and stop.is_set():
+                break
+            if progress is not None and time.monotonic() - reported >= 0.1:
+                reported = time.monotonic()
+                state = snapshot()
+                progress(state["nodes"], len(state["frames"]), len(state["best_partial"]))
+    except StopIteration as done:
+        return done.value
+    steps.close()
+    return None, snapshot()["best_partial"]
+
+
+def solve_two_phase(instance, frecuencies, hints=None, symmetry=True, stop=None, progress=None, stats=None):
+    # Phase one searches over timeslots only, under the teacher and group
+    # constraints. Each timeslot keeps a bipartite matching of its groups to
+    # compatible rooms (capacity and requires_lab), extended by one
+    # augmenting path per placement, so a slot is refused as soon as its
+    # groups can no longer all get a room. Phase two reads the rooms off the
+    # final matchings. Same contract as solve().
+    n_slots = instance.n_slots
+    group_teacher = instance.group_teacher
+    hints = hints or {}
+
+    csp_variables = [(group, i) for group, freq in enumerate(frecuencies) for i in range(freq)]
+    var_group = [group for group, _ in csp_variables]
+    group_rooms = [
+        sum(1 << r for r in range(instance.n_rooms) if domain & instance.room_masks[r])
+        for domain in instance.group_domains
+    ]
+    all_slots = instance.slot_row
+    domains = []
+    for group, i in csp_variables:
+        domain = instance.slots_of(instance.group_domains[group])
+        if symmetry:
+            later = frecuencies[group] - 1 - i
+            domain &= ~((1 << i) - 1) & ((1 << max(n_slots - later, 0)) - 1)
+        domains.append(domain)
+
+    teacher_vars = defaultdict(list)
+    group_vars = defaultdict(list)
+    for var, group in enumerate(var_group):
+        teacher_vars[group_teacher[group]].append(var)
+        group_vars[group].append(var)
+
+    assignment = {}
+    # slot_rooms[slot]: room -> variable, the current matching of that slot.
+    slot_rooms = [{} for _ in range(n_slots)]
+    trail = []
+    teacher_load = [-len(instance.teacher_groups[group_teacher[group]]) for group in var_group]
+
+    def mrv_key(var):
+        return (domains[var].bit_count(), teacher_load[var], var)
+
+    unassigned_queue = IndexedHeap(mrv_key(var) for var in range(len(csp_variables)))
+
+    def augment(var, rooms):
+        # Depth-first search for an augmenting path on an explicit stack of
+        # (occupant, rooms left to try); path[k] is the room taken by the
+        # occupant of stack[k], so reaching a free room shifts everyone along.
+        visited = set()
+        path = []
+        stack = [(var, iter_bits(group_rooms[var_group[var]]))]
+        while stack:
+            for room in stack[-1][1]:
+                if room in visited:
+                    continue
+                visited.add(room)
+                other = rooms.get(room)
+                path.append(room)
+                if other is None:
+                    for (occupant, _), taken in zip(stack, path):
+                        rooms[taken] = occupant
+                    return True
+                stack.append((other, iter_bits(group_rooms[var_group[other]])))
+                break
+            else:
+                stack.pop()
+                if path:
+                    path.pop()
+        return False
+
+    def assign(var, slot):
+        if not augment(var, slot_rooms[slot]):
+            return False
+        assignment[var] = slot
+        unassigned_queue.remove(var)
+        return True
+
+    def unassign(var):
+        rooms = slot_rooms[assignment.pop(var)]
+        for room, occupant in list(rooms.items()):
+            if occupant == var:
+                del rooms[room]
+        unassigned_queue.push(var, mrv_key(var))
+
+    def prune(other_var, mask, mark):
+        removed = domains[other_var] & mask
+        if not removed:
+            return True
+        domains[other_var] ^= removed
+        trail.append((other_var, removed))
+        unassigned_queue.update(other_var, mrv_key(other_var))
+        if domains[other_var]:
+            return True
+        restore_domains(mark)
+        return False
+
+    def forward_check(var, slot):
+        mark = len(trail)
+        slot_bit = 1 << slot
+        for other_var in teacher_vars[group_teacher[var_group[var]]]:
+            if other_var in assignment:
+                continue
+            if not prune(other_var, slot_bit, mark):
                 return None
-            return sorted(unassigned, key=lambda var: (len(domains[var]), -len(teacher_to_groups[group_data[var[0]]["teacher_id"]]))) [0]
-
-        def order_domain_values(var, domains, assignment):
-            gid, _ = var
-            teacher_id = group_data[gid]["teacher_id"]
-            value_conflicts = []
-            for val in domains[var]:
-                room_id, timeslot_id = val
-                conflicts = sum(
-                    1 for other_var in domains
-                    if other_var != var and other_var not in assignment and any(
-                        (v[0] == room_id and v[1] == timeslot_id) or
-                        (group_data[other_var[0]]["teacher_id"] == teacher_id and v[1] == timeslot_id) or
-                        (other_var[0] == gid and v[1] == timeslot_id)
-                        for v in domains[other_var]
-                    )
-                )
-                value_conflicts.append((conflicts, val))
-            return [v for _, v in sorted(value_conflicts, key=lambda x: (x[0], timeslot_ids.index(x[1][1])))]
-
-        def backtrack():
-            if len(assignment) == len(csp_variables):
-                return True
-            var = select_unassigned_group(domains, assignment)
-            if var is None:
+        if symmetry:
+            occurrence = csp_variables[var][1]
+            earlier = all_slots & ~((1 << slot) - 1)
+            later = (1 << (slot + 1)) - 1
+            for other_var in group_vars[var_group[var]]:
+                if other_var in assignment:
+                    continue
+                mask = earlier if csp_variables[other_var][1] < occurrence else later
+                if not prune(other_var, mask, mark):
+                    return None
+        return mark
+
+    def restore_domains(mark):
+        while len(trail) > mark:
+            other_var, removed = trail.pop()
+            domains[other_var] |= removed
+            if other_var in unassigned_queue:
+                unassigned_queue.update(other_var, mrv_key(other_var))
+
+    def order_slots(var):
+        # Fewest competing variables of the same teacher first, then the
+        # emptiest timeslot so rooms stay available for later groups.
+        teacher = group_teacher[var_group[var]]
+        keyed = []
+        for slot in iter_bits(domains[var]):
+            slot_bit = 1 << slot
+            competing = sum(
+                1 for other_var in teacher_vars[teacher]
+                if other_var != var and other_var not in assignment and domains[other_var] & slot_bit
+            )
+            keyed.append((competing, len(slot_rooms[slot]), slot))
+        keyed.sort()
+        ordered = [slot for _, _, slot in keyed]
+        hint = hints.get(csp_variables[var])
+        if hint is not None and hint % n_slots in ordered:
+            ordered.remove(hint % n_slots)
+            ordered.insert(0, hint % n_slots)
+        return ordered
+
+    def rooms_of_assignment():
+        values = {}
+        for slot, rooms in enumerate(slot_rooms):
+            for room, var in rooms.items():
+                values[csp_variables[var]] = room * n_slots + slot
+        return values
+
+    best_partial = {}
+    nodes = 0
+    # Explicit search stack, as in search_steps: [var, slots left to try,
+    # trail mark], where the mark is None while the variable holds no slot.
+    stack = []
+
+    def backtrack():
+        nonlocal best_partial, nodes
+        descend = True
+        while True:
+            if descend:
+                if len(assignment) == len(csp_variables):
+                    return True
+                nodes += 1
+                if nodes % 256 == 0:
+                    if stop is not None and stop.is_set():
+                        raise SearchStopped
+                    if progress is not None:
+                        progress(nodes, len(assignment), len(best_partial))
+                var = unassigned_queue.peek()
+                stack.append([var, order_slots(var)[::-1], None])
+                descend = False
+            frame = stack[-1]
+            var, slots, mark = frame
+            if mark is not None:
+                # The child failed.
+                frame[2] = None
+                restore_domains(mark)
+                unassign(var)
+            while slots:
+                slot = slots.pop()
+                if assign(var, slot):
+                    mark = forward_check(var, slot)
+                    if mark is not None:
+                        frame[2] = mark
+                        descend = True
+                        break
+                    unassign(var)
+            if descend:
+                continue
+            stack.pop()
+            if len(assignment) > len(best_partial):
+                best_partial = rooms_of_assignment()
+            if not stack:
                 return False
-            for value in order_domain_values(var, domains, assignment):
-                if is_valid(var, *value, assignment):
-                    assignment[var] = value
-                    pruned = forward_check(domains, var, value, assignment)
-                    if pruned is not None:
-                        if backtrack():
-                            return True
-                        restore_domains(domains, pruned)
-                    del assignment[var]
-            return False
 
+    try:
         if backtrack():
-            best_solution_found = copy.deepcopy(assignment)
-            print(f"Successfully found a schedule with target frequencies: {current_frecuencies}")
+            solution = rooms_of_assignment()
+            return solution, solution
+    except SearchStopped:
+        if len(assignment) > len(best_partial):
+            best_partial = rooms_of_assignment()
+    finally:
+        if stats is not None:
+            stats.count("nodes", nodes)
+    return None, best_partial
+
+
+def solve_local_search(instance, frecuencies, hints=None, time_limit=10.0, max_steps=None, seed=0, tabu_tenure=10, stop=None,
+                       progress=None, stats=None):
+    # Min-conflicts repair with a tabu list. Every occurrence always holds a
+    # value from its room-compatible domain; a step moves one conflicting
+    # occurrence to its least-conflicting value that is not tabu (unless the
+    # move beats the best schedule seen). Stops at zero conflicts, after
+    # time_limit seconds or after max_steps moves. Same contract as solve():
+    # when conflicts remain, the best schedule found with its conflicting
+    # occurrences removed is returned as the partial assignment.
+    n_slots = instance.n_slots
+    group_teacher = instance.group_teacher
+    rng = random.Random(seed)
+    hints = hints or {}
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+
+    csp_variables = [(group, i) for group, freq in enumerate(frecuencies) for i in range(freq)]
+    var_teacher = [group_teacher[group] for group, _ in csp_variables]
+    # Occurrences with the same room-compatible domain share one value list.
+    value_lists = {}
+    domains = []
+    for group, _ in csp_variables:
+        domain = instance.group_domains[group]
+        if domain not in value_lists:
+            value_lists[domain] = list(iter_bits(domain))
+        domains.append(value_lists[domain])
+    movable = [var for var in range(len(csp_variables)) if domains[var]]
+
+    # Occupants per value and per (teacher, timeslot); a variable is in
+    # conflict when it shares either with another variable.
+    at_value = defaultdict(set)
+    at_teacher_slot = defaultdict(set)
+    values = {}
+
+    def conflicts_of(var):
+        value = values[var]
+        return len(at_value[value]) - 1 + len(at_teacher_slot[var_teacher[var] * n_slots + value % n_slots]) - 1
+
+    def place(var, value):
+        values[var] = value
+        at_value[value].add(var)
+        at_teacher_slot[var_teacher[var] * n_slots + value % n_slots].add(var)
+
+    def lift(var):
+        value = values.pop(var)
+        at_value[value].discard(var)
+        at_teacher_slot[var_teacher[var] * n_slots + value % n_slots].discard(var)
+        return value
+
+    def cost(var, value):
+        return len(at_value[value]) + len(at_teacher_slot[var_teacher[var] * n_slots + value % n_slots])
+
+    def least_conflicting(var, allowed=lambda value: True):
+        best_cost = None
+        choices = []
+        for value in domains[var]:
+            if not allowed(value):
+                continue
+            c = cost(var, value)
+            if best_cost is None or c < best_cost:
+                best_cost, choices = c, [value]
+            elif c == best_cost:
+                choices.append(value)
+        return (rng.choice(choices), best_cost) if choices else (None, None)
+
+    def out_of_time():
+        return (deadline is not None and time.monotonic() > deadline) or (stop is not None and stop.is_set())
+
+    # Greedy start: most constrained occurrences first, hints kept when given.
+    # A stop during it leaves the remaining occurrences unplaced.
+    for n, var in enumerate(sorted(movable, key=lambda v: len(domains[v]))):
+        if n % 64 == 0 and out_of_time():
             break
+        hint = hints.get(csp_variables[var])
+        if hint is not None and instance.group_domains[csp_variables[var][0]] >> hint & 1:
+            place(var, hint)
         else:
-            print(f"No solution found. Reducing a group's frequency.")
-            reducible = [(groupId, frequency) for groupId, frequency in current_frecuencies.items() if frequency > 0]
-            if not reducible:
-                break
-            group_to_reduce = max(reducible, key=lambda x: x[1])[0]
-            current_frecuencies[group_to_reduce] -= 1
-            print(f"Reduced frequency for Group {group_to_reduce} to {current_frecuencies[group_to_reduce]}.")
+            place(var, least_conflicting(var)[0])
+
+    def total_conflicts():
+        return sum(conflicts_of(var) for var in values) // 2
+
+    current = total_conflicts()
+    best_values, best_conflicts = dict(values), current
+    tabu = {}
+    step = 0
+    while best_conflicts > 0:
+        if max_steps is not None and step >= max_steps:
+            break
+        if out_of_time():
+            break
+        if progress is not None and step % 64 == 0:
+            # Best schedule size less one occurrence per conflict.
+            progress(step, len(values), len(best_values) - best_conflicts)
+        step += 1
+        conflicted = [var for var in values if conflicts_of(var)]
+        var = rng.choice(conflicted)
+        old_value = lift(var)
+        old_cost = cost(var, old_value)
+        value, new_cost = least_conflicting(
+            var,
+            lambda v: v != old_value and (tabu.get((var, v), 0) < step or current - old_cost + cost(var, v) < best_conflicts),
+        )
+        if value is None:
+            place(var, old_value)
+            continue
+        place(var, value)
+        tabu[(var, old_value)] = step + tabu_tenure
+        current += new_cost - old_cost
+        if current < best_conflicts:
+            best_values, best_conflicts = dict(values), current
+    if stats is not None:
+        stats.count("moves", step)
+
+    if best_conflicts == 0 and len(best_values) == len(csp_variables):
+        solution = {csp_variables[var]: value for var, value in best_values.items()}
+        return solution, solution
+
+    # Keep a conflict-free subset of the best schedule.
+    kept = {}
+    used_values = set()
+    busy = set()
+    for var, value in best_values.items():
+        slot_key = (var_teacher[var], value % n_slots)
+        if value in used_values or slot_key in busy:
+            continue
+        used_values.add(value)
+        busy.add(slot_key)
+        kept[csp_variables[var]] = value
+    return None, kept
+
+
+
+# Configurations raced by the portfolio engine: (method, options).
+PORTFOLIO = [
+    ("backtracking", {}),
+    ("backtracking", {"propagation": "node"}),
+    ("backtracking", {"restarts": "luby", "weighting": True, "seed": 1}),
+    ("backtracking", {"learn_nogoods": True}),
+    ("two_phase", {}),
+    ("local_search", {"seed": 1}),
+    ("local_search", {"seed": 2}),
+]
+# Engines whose failure, unless stopped, proves the frequencies infeasible.
+COMPLETE_ENGINES = {"backtracking", "two_phase"}
+
+
+def run_portfolio_member(instance, frecuencies, hints, method, options, stop):
+    options = learning_options(dict(options), method)
+    stats = SolverStats()
+    result = ENGINES[method](instance, frecuencies, hints=hints, stop=stop, stats=stats, **options)
+    return result, stats.to_dict()
+
+
+def solve_portfolio(instance, frecuencies, hints=None, configs=None, workers=None, stop=None, progress=None, stats=None):
+    # Races several engine configurations in a process pool. The first
+    # complete schedule wins and the others are told to stop through a
+    # shared event; if none completes, the largest partial is returned. A
+    # complete engine failing on its own ends the race the same way.
+    # Every configuration gets its own process by default so that the race
+    # is fair even with fewer cores than configurations.
+    configs = configs or PORTFOLIO
+    workers = workers or len(configs)
+    best_partial = {}
+    with multiprocessing.Manager() as manager:
+        shared_stop = manager.Event()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {
+                executor.submit(run_portfolio_member, instance, frecuencies, hints, method, options, shared_stop): method
+                for method, options in configs
+            }
+            try:
+                while pending:
+                    done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    if stop is not None and stop.is_set():
+                        shared_stop.set()
+                    if progress is not None:
+                        progress(0, 0, len(best_partial))
+                    for future in done:
+                        method = pending.pop(future)
+                        try:
+                            (solution, partial), member_stats = future.result()
+                        except Exception as e:
+                            print(f"Portfolio: {method} failed: {e!r}")
+                            continue
+                        if stats is not None:
+                            stats.merge(member_stats)
+                        if solution is not None:
+                            print(f"Portfolio: {method} found a complete schedule first.")
+                            return solution, solution
+                        if len(partial) > len(best_partial):
+                            best_partial = partial
+                        if method in COMPLETE_ENGINES and not shared_stop.is_set():
+                            print(f"Portfolio: {method} proved these frequencies infeasible.")
+                            return None, best_partial
+            finally:
+                shared_stop.set()
+                for future in pending:
+                    future.cancel()
+    return None, best_partial
+
+
+def assigned_counts(instance, assignment):
+    counts = [0] * instance.n_groups
+    for group, _ in assignment:
+        counts[group] += 1
+    return counts
+
+
+def trim_to_capacity(instance, target):
+    # Static pigeonhole bounds, applied before any search: a teacher cannot
+    # give more meetings than there are timeslots, and the groups restricted
+    # to a room class cannot meet more often than that class has
+    # (room, timeslot) values. Excess is taken from the largest frequencies.
+    # The passes do not see each other's cuts, so the result is only a
+    # starting point: a trimmed unit can still fit.
+    def reduce(groups, capacity, reason):
+        excess = sum(target[g] for g in groups) - capacity
+        if excess <= 0:
+            return
+        print(f"{reason} needs {excess} more meetings than fit; reducing its largest frequencies.")
+        for _ in range(excess):
+            g = max(groups, key=lambda g: (target[g], -g))
+            target[g] -= 1
+
+    for teacher, groups in enumerate(instance.teacher_groups):
+        reduce(groups, instance.n_slots, f"Teacher {instance.teacher_ids[teacher]}")
+    for base in set(instance.group_domains):
+        if base:
+            groups = [g for g in range(instance.n_groups) if instance.group_domains[g] & ~base == 0]
+            rooms = [instance.room_names[r] for r in range(instance.n_rooms) if base & instance.room_masks[r]]
+            reduce(groups, base.bit_count(), f"Room class {rooms}")
+    return target
+
+
+ENGINES = {
+    "backtracking": solve,
+    "two_phase": solve_two_phase,
+    "local_search": solve_local_search,
+    "portfolio": solve_portfolio,
+}
+
+
+def solve_with_relaxation(instance, frecuencies, method="backtracking", hints=None, **options):
+    # Finds a maximal feasible set of frequencies below the targets. After a
+    # failed solve the largest partial assignment is a known feasible
+    # schedule (lo); the units still missing up to the targets are then added
+    # back in halving chunks, each retry warm-started from the best schedule
+    # so far. A unit that cannot be added on its own rules out the rest of
+    # that group's units, since adding meetings never makes a schedule easier.
+    # method picks the engine from ENGINES; options are passed through to it.
+    # learn_nogoods shares one NogoodStore across the backtracking retries.
+    # Once options["stop"] is set, the best schedule so far is returned.
+    engine = ENGINES[method]
+    stop = options.get("stop")
+    learning_options(options, method)
 
-    if best_solution_found:
+    stats = options.get("stats")
+
+    def describe(freqs):
+        # Totals only; printing every group's frequency is slow on big terms.
+        return f"{sum(freqs)} meetings over {sum(1 for f in freqs if f)} groups"
+
+    target = list(frecuencies)
+    for g in range(instance.n_groups):
+        if target[g] and not instance.group_domains[g]:
+            print(f"Group {instance.group_ids[g]} fits no room; reducing its frequency to 0.")
+            target[g] = 0
+        # A group's teacher gives at most one meeting per timeslot.
+        target[g] = min(target[g], instance.n_slots)
+    # Only the first attempt uses the trimmed frequencies; the units trimmed
+    # away stay below hi and are retried like any other missing unit.
+    first = trim_to_capacity(instance, list(target))
+    print(f"\nAttempting to solve with target frequencies: {describe(first)}")
+    solution, best = engine(instance, first, hints=hints, **options)
+    if solution is not None and (first == target or method == "local_search"):
+        print(f"Successfully found a schedule with target frequencies: {describe(first)}")
+        return solution
+    if stop is not None and stop.is_set():
+        print("Stopped; keeping the best schedule found so far.")
+        return solution if solution is not None else best
+    if solution is None and method == "local_search":
+        # Local search cannot prove a retry infeasible, so its best schedule
+        # within the budget is the answer.
+        print(f"Keeping the best schedule found within the budget: {describe(assigned_counts(instance, best))}")
+        return best
+
+    if solution is not None:
+        best = solution
+    lo = assigned_counts(instance, best)
+    hi = list(target)
+    chunk = None
+    while True:
+        # Groups with a smaller target are added back first, mirroring the
+        # old rule of reducing the largest frequency.
+        pending = [
+            g for g in sorted(range(instance.n_groups), key=lambda g: (hi[g], g))
+            for _ in range(hi[g] - lo[g])
+        ]
+        if not pending:
+            break
+        chunk = len(pending) // 2 if chunk is None else min(chunk, len(pending))
+        chunk = max(chunk, 1)
+        trial = list(lo)
+        for g in pending[:chunk]:
+            trial[g] += 1
+
+        print(f"No solution found. Retrying with {chunk} of {len(pending)} missing meetings: {describe(trial)}")
+        if stats is not None:
+            stats.count("retries")
+        solution, partial = engine(instance, trial, hints=best, **options)
+        if solution is not None:
+            best, lo = solution, trial
+            chunk = len(pending) - chunk
+            continue
+
+        partial_counts = assigned_counts(instance, partial)
+        if sum(partial_counts) > sum(lo) and all(p >= l for p, l in zip(partial_counts, lo)):
+            best, lo = partial, partial_counts
+        if stop is not None and stop.is_set():
+            print("Stopped; keeping the best schedule found so far.")
+            return best
+        if chunk == 1:
+            group = pending[0]
+            hi[group] = lo[group]
+            print(f"Reduced frequency for Group {instance.group_ids[group]} to {hi[group]}.")
+            chunk = None
+        else:
+            chunk //= 2
+
+    print(f"Successfully found a schedule with target frequencies: {describe(lo)}")
+    return best
+
+
+def load_schedule(instance, db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT group_id, room_id, timeslot_id FROM group_schedule").fetchall()
+    conn.close()
+    return schedule_from_rows(instance, rows)
+
+
+def schedule_from_rows(instance, rows):
+    # (group_id, room_id, timeslot_id) rows as {(group, occurrence): value},
+    # occurrences numbered in timeslot order. Rows whose group, room or
+    # timeslot no longer exists are dropped.
+    group_values = defaultdict(list)
+    for group_id, room_id, timeslot_id in rows:
+        group = instance.group_index.get(group_id)
+        room = instance.room_index.get(room_id)
+        slot = instance.timeslot_index.get(timeslot_id)
+        if group is None or room is None or slot is None:
+            continue
+        group_values[group].append(instance.value(room, slot))
+
+    schedule = {}
+    for group, values in group_values.items():
+        for i, value in enumerate(sorted(values, key=instance.slot_of)):
+            schedule[(group, i)] = value
+    return schedule
+
+
+def split_stale(instance, schedule):
+    # Keeps the stored placements that still hold under the current data and
+    # drops the rest: occurrences beyond a lowered frequency, rooms the group
+    # no longer fits, and clashes with an already kept placement of the same
+    # room or teacher. Kept occurrences are renumbered from 0 per group.
+    kept = {}
+    used_values = set()
+    teacher_slots = set()
+    counts = [0] * instance.n_groups
+    for (group, _), value in sorted(schedule.items(), key=lambda item: (item[0][0], instance.slot_of(item[1]))):
+        teacher_slot = (instance.group_teacher[group], instance.slot_of(value))
+        if counts[group] >= instance.group_frecuency[group] or not instance.group_domains[group] >> value & 1:
+            continue
+        if value in used_values or teacher_slot in teacher_slots:
+            continue
+        kept[(group, counts[group])] = value
+        counts[group] += 1
+        used_values.add(value)
+        teacher_slots.add(teacher_slot)
+    return kept, sum(instance.group_frecuency) - len(kept)
+
+
+def repair_schedule(instance, schedule, **options):
+    # Re-solves only the neighbourhood an edit broke. The missing occurrences
+    # are placed around every kept placement; if that fails, the kept
+    # placements of the teachers involved are released too (tried at their
+    # old values first); if that also fails, everything is re-solved with the
+    # kept placements as hints only, and only if the full frequencies are
+    # infeasible they are relaxed around the placements of the other
+    # teachers. Every step shares one learn_nogoods store.
+    learning_options(options)
+    kept, missing = split_stale(instance, schedule)
+    if not missing:
+        print("The stored schedule is still valid; nothing to repair.")
+        return kept
+    print(f"Repairing {missing} missing placements around {len(kept)} kept ones.")
+    # A group's teacher gives at most one meeting per timeslot.
+    frecuencies = [min(f, instance.n_slots) for f in instance.group_frecuency]
+    counts = assigned_counts(instance, kept)
+    teachers = {instance.group_teacher[g] for g in range(instance.n_groups) if counts[g] < frecuencies[g]}
+    released = {key: value for key, value in kept.items() if instance.group_teacher[key[0]] not in teachers}
+    stop = options.get("stop")
+    for fixed in (kept, released):
+        solution, partial = solve(instance, frecuencies, hints=kept, fixed=fixed, **options)
+        if solution is not None:
+            return solution
+        if stop is not None and stop.is_set():
+            return partial if len(partial) > len(kept) else kept
+    print("Local repair failed; solving again from the kept placements.")
+    solution, partial = solve(instance, frecuencies, hints=kept, **options)
+    if solution is not None:
+        return solution
+    if stop is not None and stop.is_set():
+        return partial if len(partial) > len(kept) else kept
+    print("Relaxing frequencies around the placements of the other teachers.")
+    return solve_with_relaxation(instance, frecuencies, hints=kept, fixed=released, **options)
+
+
+# Solved schedules kept inside the database, keyed by Instance.fingerprint.
+CACHE_SIZE = 20
+
+
+def load_cached_schedules(instance, db_path, fingerprint):
+    # Returns the cached schedule of this exact instance, or None, and the
+    # most recent cached schedule of any other instance as a warm start.
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS solution_cache (fingerprint TEXT PRIMARY KEY, schedule TEXT NOT NULL, created_at REAL NOT NULL)")
+    exact = conn.execute("SELECT schedule FROM solution_cache WHERE fingerprint = ?", (fingerprint,)).fetchone()
+    nearest = conn.execute("SELECT schedule FROM solution_cache WHERE fingerprint != ? ORDER BY created_at DESC LIMIT 1", (fingerprint,)).fetchone()
+    conn.close()
+    if exact:
+        exact = schedule_from_rows(instance, json.loads(exact[0]))
+    nearest = schedule_from_rows(instance, json.loads(nearest[0])) if nearest else {}
+    return exact, nearest
+
+
+def save_cached_schedule(cursor, fingerprint, rows):
+    cursor.execute("CREATE TABLE IF NOT EXISTS solution_cache (fingerprint TEXT PRIMARY KEY, schedule TEXT NOT NULL, created_at REAL NOT NULL)")
+    cursor.execute("INSERT OR REPLACE INTO solution_cache (fingerprint, schedule, created_at) VALUES (?, ?, ?)", (fingerprint, json.dumps(rows), time.time()))
+    cursor.execute("DELETE FROM solution_cache WHERE fingerprint NOT IN (SELECT fingerprint FROM solution_cache ORDER BY created_at DESC LIMIT ?)", (CACHE_SIZE,))
+
+
+def save_schedule(db_path, rows, fingerprint=None):
+    # Replaces group_schedule with rows of (group_id, room_id, timeslot_id)
+    # in one transaction: the rows are bulk-loaded into a temporary staging
+    # table, checked for double-booked rooms, and swapped in with a single
+    # DELETE and INSERT ... SELECT. With WAL journaling, readers keep seeing
+    # the old schedule until the commit and are never blocked by it. A
+    # fingerprint also stores the rows in the solution cache, in the same
+    # transaction.
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS group_schedule_staging (group_id INTEGER, room_id INTEGER, timeslot_id INTEGER)")
+        conn.execute("BEGIN IMMEDIATE")
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM group_schedule")
-            for (gid, _), (room_id, timeslot_id) in best_solution_found.items():
-                cursor.execute("INSERT INTO group_schedule (group_id, room_id, timeslot_id) VALUES (?, ?, ?)", (gid, room_id, timeslot_id))
-            conn.commit()
-            conn.close()
-
-            final_report = defaultdict(int)
-            for (gid, _), _ in best_solution_found.items():
-                final_report[gid] += 1
-
-            report_lines = []
-            for gid in sorted(original_frecuencies):
-                original = original_frecuencies[gid]
-                assigned = final_report[gid]
-                if assigned == original:
-                    report_lines.append(f"  Group {gid}: Assigned {assigned} (Target: {original}) - ✓")
-                elif assigned > 0:
-                    report_lines.append(f"  Group {gid}: Assigned {assigned} (Reduced from {original})")
-                else:
-                    report_lines.append(f"  Group {gid}: Assigned 0 (Target: {original}) - ✗")
-
-            return "Schedule generated successfully:\n" + "\n".join(report_lines)
-
-        except Exception as e:
-            return f"Failed to save schedule: {e}"
-
-    return "No feasible schedule found after all attempts."
+            conn.execute("DELETE FROM group_schedule_staging")
+            conn.executemany("INSERT INTO group_schedule_staging (group_id, room_id, timeslot_id) VALUES (?, ?, ?)", rows)
+            clash = conn.execute(
+                "SELECT room_id, timeslot_id FROM group_schedule_staging GROUP BY room_id, timeslot_id HAVING COUNT(*) > 1 LIMIT 1"
+            ).fetchone()
+            if clash:
+                raise ValueError(f"Room {clash[0]} is booked twice at timeslot {clash[1]}.")
+            conn.execute("DELETE FROM group_schedule")
+            conn.execute(
+                "INSERT INTO group_schedule (group_id, room_id, timeslot_id) "
+                "SELECT group_id, room_id, timeslot_id FROM group_schedule_staging"
+            )
+            if fingerprint is not None:
+                save_cached_schedule(conn, fingerprint, rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def solve_database(db_path, method="backtracking", incremental=False, cache=True, deadline=None, stop=None,
+                   progress=None, stats=None, profile=None, accept_partial=None, **options):
+    # Solves one database and writes the schedule back. incremental repairs
+    # the stored schedule after small edits instead of solving from scratch.
+    # cache returns the cached schedule of an identical instance at once,
+    # unless incremental finds the stored schedule edited since, and
+    # otherwise warm-starts (hints only) from the latest cached one. Repairs
+    # use backtracking; other methods only take the old schedule as hints. The
+    # search ends early at deadline (a time.time() value) or once the stop
+    # event is set. The best partial schedule then replaces the stored one
+    # only if it places more meetings, or if accept_partial(assigned, target,
+    # stored) returns True; summary["saved"] tells which happened. progress
+    # receives {"nodes", "depth", "best", "elapsed"} dicts, from the solving
+    # thread, at most every 0.1 seconds. stats is a SolverStats to fill (a
+    # new one by default); profile is a path to dump cProfile data of the
+    # solve phase to.
+    # Returns a JSON-ready summary: status is "solved", "reduced",
+    # "stopped", "infeasible" or "failed".
+    start = time.time()
+    budget = SolveBudget(stop, deadline)
+    stats = stats or SolverStats()
+    options["stop"] = budget
+    options["stats"] = stats
+    learning_options(options, method)
+    if progress is not None:
+        reported = 0
+
+        def report(nodes, depth, best):
+            nonlocal reported
+            now = time.time()
+            if now - reported >= 0.1:
+                reported = now
+                progress({"nodes": nodes, "depth": depth, "best": best, "elapsed": now - start})
+
+        options["progress"] = report
+
+    with stats.phase("db_io"):
+        instance = load_instance(db_path)
+        fingerprint = instance.fingerprint()
+        exact, nearest = load_cached_schedules(instance, db_path, fingerprint) if cache else (None, {})
+        schedule = load_schedule(instance, db_path) if incremental else {}
+    summary = {
+        "database": db_path,
+        "method": method,
+        "status": None,
+        "groups": [],
+        "assigned": 0,
+        "target": sum(instance.group_frecuency),
+        "runtime": None,
+        "nodes": 0,
+        "saved": False,
+    }
+
+    def finish(status):
+        summary["status"] = status
+        summary["runtime"] = time.time() - start
+        summary["nodes"] = stats.counts["nodes"]
+        summary["stats"] = stats.to_dict()
+        return summary
+
+    def search():
+        # With incremental, a stored schedule edited since it was cached is
+        # repaired rather than replaced by the cached one.
+        if exact is not None and (not schedule or schedule == exact):
+            print("Using the cached schedule of this instance.")
+            return exact
+        # Only incremental pins placements; another instance's cached
+        # schedule is just a warm start.
+        if schedule and method == "backtracking":
+            return repair_schedule(instance, schedule, **options)
+        return solve_with_relaxation(instance, instance.group_frecuency, method=method, hints=schedule or nearest, **options)
+
+    with stats.phase("solve"):
+        if profile:
+            profiler = cProfile.Profile()
+            best_solution_found = profiler.runcall(search)
+            profiler.dump_stats(profile)
+        else:
+            best_solution_found = search()
+    stopped = budget.triggered
+    if not best_solution_found and not stopped:
+        return finish("infeasible")
+
+    counts = assigned_counts(instance, best_solution_found)
+    summary["groups"] = [
+        {"group_id": gid, "assigned": counts[g], "target": instance.group_frecuency[g]}
+        for g, gid in sorted(enumerate(instance.group_ids), key=lambda item: item[1])
+    ]
+    summary["assigned"] = sum(counts)
+    if stopped:
+        with stats.phase("db_io"):
+            stored = len(split_stale(instance, load_schedule(instance, db_path))[0])
+        if summary["assigned"] <= stored and not (
+            accept_partial is not None and accept_partial(summary["assigned"], summary["target"], stored)
+        ):
+            print(f"Stopped with {summary['assigned']} meetings placed; keeping the stored schedule ({stored}).")
+            return finish("stopped")
+
+    try:
+        with stats.phase("db_io"):
+            rows = [
+                (instance.group_ids[group], *instance.to_ids(value))
+                for (group, _), value in sorted(best_solution_found.items())
+            ]
+            save_schedule(db_path, rows, fingerprint if cache and not stopped else None)
+    except Exception as e:
+        summary["error"] = f"Failed to save schedule: {e}"
+        return finish("failed")
+    summary["saved"] = True
+
+    if stopped:
+        return finish("stopped")
+    if summary["assigned"] < summary["target"]:
+        return finish("reduced")
+    return finish("solved")
+
+
+def run_solver(db_path, method="backtracking", **options):
+    # solve_database with the summary formatted as a report for the viewer.
+    summary = solve_database(db_path, method=method, **options)
+    if summary["status"] == "infeasible":
+        return "No feasible schedule can be found, even after reducing all group frequencies to zero."
+    if summary["status"] == "failed":
+        return summary["error"]
+
+    report_lines = []
+    for entry in summary["groups"]:
+        gid, assigned, original = entry["group_id"], entry["assigned"], entry["target"]
+        if assigned == original:
+            report_lines.append(f"  Group {gid}: Assigned {assigned} (Target: {original}) - ✓")
+        elif assigned > 0:
+            report_lines.append(f"  Group {gid}: Assigned {assigned} (Reduced from {original})")
+        else:
+            report_lines.append(f"  Group {gid}: Assigned 0 (Target: {original}) - ✗")
+
+    if summary["status"] == "stopped" and not summary["saved"]:
+        return (
+            f"Solving stopped early with {summary['assigned']} of {summary['target']} meetings placed; "
+            "the stored schedule was kept."
+        )
+    if summary["status"] == "stopped":
+        return "Solving stopped early; saved the best schedule found so far:\n" + "\n".join(report_lines)
+    return "Schedule generated successfully:\n" + "\n".join(report_lines)
+
+
+def solve_database_quietly(db_path, options):
+    # Batch worker: solver messages go to stderr so that stdout only carries
+    # the JSON summaries. Errors are reported in the summary.
+    start = time.time()
+    time_limit = options.pop("time_limit", None)
+    if time_limit:
+        options["deadline"] = start + time_limit
+    profile_dir = options.pop("profile_dir", None)
+    if profile_dir:
+        options["profile"] = os.path.join(profile_dir, os.path.splitext(os.path.basename(db_path))[0] + ".prof")
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            return solve_database(db_path, **options)
+    except Exception as e:
+        return {"database": db_path, "status": "failed", "error": repr(e), "runtime": time.time() - start}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve schedule databases without the viewer.")
+    parser.add_argument("databases", nargs="+", help="database files or glob patterns")
+    parser.add_argument("--method", choices=sorted(ENGINES), default="backtracking")
+    parser.add_argument("--workers", type=int, default=None, help="parallel processes (default: CPU count)")
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per database")
+    parser.add_argument("--incremental", action="store_true", help="repair the stored schedules")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not update the solution cache")
+    parser.add_argument("--learn-nogoods", action="store_true", help="backtracking: backjump and reuse learned nogoods")
+    parser.add_argument("--summary", help="also write all summaries to this JSON file")
+    parser.add_argument("--profile-dir", help="write cProfile data of each solve to DIR/<database>.prof")
+    args = parser.parse_args(argv)
+    if args.profile_dir:
+        os.makedirs(args.profile_dir, exist_ok=True)
+
+    paths = []
+    for pattern in args.databases:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        paths.extend(path for path in matches if path not in paths)
+
+    options = {
+        "method": args.method, "incremental": args.incremental, "cache": not args.no_cache,
+        "time_limit": args.time_limit, "profile_dir": args.profile_dir, "learn_nogoods": args.learn_nogoods,
+    }
+    summaries = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = []
+        for path in paths:
+            if not os.path.isfile(path):
+                summaries.append({"database": path, "status": "failed", "error": "No such database file.", "runtime": 0.0})
+                print(json.dumps(summaries[-1]), flush=True)
+                continue
+            futures.append(executor.submit(solve_database_quietly, path, dict(options)))
+        for future in as_completed(futures):
+            summaries.append(future.result())
+            print(json.dumps(summaries[-1]), flush=True)
+
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(sorted(summaries, key=lambda summary: summary["database"]), f, indent=2)
+    return 0 if all(summary["status"] in ("solved", "reduced") for summary in summaries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
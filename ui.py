@@ -5,6 +5,8 @@ import importlib.util
 import os
 from collections import defaultdict
 import threading
+import queue
+import time
 import subprocess
 import sys
 # new comment git testing
@@ -17,6 +19,14 @@ class ScheduleApp:
         self.root.columnconfigure(0, weight=1)
 
         self.db_path = None
+        self.conn = None
+        # In-memory copy of the schedule, see refresh_index
+        self.data_version = None
+        self.schedule_entries = []
+        self.schedule_index = {}
+        self.filter_options = {}
+        self.timeslot_ids = {}
+        self.rendered = {}
 
         # TreeView Main frame
         self.main_frame = ttk.Frame(root)
@@ -69,6 +79,17 @@ class ScheduleApp:
         self.apply_button = ttk.Button(self.control_frame, text="Apply", command=self.load_schedule)
         self.apply_button.grid(row=0, column=6, padx=10)
 
+        # Repair the stored schedule instead of solving from scratch
+        self.incremental_var = tk.BooleanVar(value=False)
+        self.incremental_check = ttk.Checkbutton(self.control_frame, text="Incremental", variable=self.incremental_var)
+        self.incremental_check.grid(row=0, column=7, padx=10)
+
+        # Solver time budget in seconds, 0 for none
+        ttk.Label(self.control_frame, text="Limit (s)").grid(row=0, column=8)
+        self.time_limit_var = tk.IntVar(value=0)
+        self.time_limit_spin = ttk.Spinbox(self.control_frame, from_=0, to=3600, width=6, textvariable=self.time_limit_var)
+        self.time_limit_spin.grid(row=0, column=9, padx=10)
+
         self.init_empty_grid()
         
     def init_empty_grid(self):
@@ -90,6 +111,10 @@ class ScheduleApp:
             messagebox.showerror("Database Error", "Valid database file not selected.")
             return
         self.db_path = path
+        if self.conn:
+            self.conn.close()
+        self.conn = self.connect()
+        self.data_version = None
         self.solve_button.config(state="normal")
         self.refresh_button.config(state="normal")
         self.update_filter_options()
@@ -98,55 +123,64 @@ class ScheduleApp:
     def connect(self):
         return sqlite3.connect(self.db_path)
 
+    def refresh_index(self):
+        # Reads the schedule into memory, indexed by group, teacher and room,
+        # but only when another connection has committed since the last read
+        # (PRAGMA data_version); every view is then served from the index.
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self.data_version:
+            return
+
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT gs.id, g.id, r.name, s.name, t.name, ts.day, ts.slot, ts.id
+        FROM group_schedule gs
+        JOIN groups g ON gs.group_id = g.id
+        JOIN rooms r ON gs.room_id = r.id
+        JOIN timeslots ts ON gs.timeslot_id = ts.id
+        JOIN subjects s ON g.subject_id = s.id
+        JOIN teachers t ON g.teacher_id = t.id
+        ''')
+        self.schedule_entries = cursor.fetchall()
+        self.schedule_index = {"Group": defaultdict(list), "Teacher": defaultdict(list), "Room": defaultdict(list)}
+        for entry in self.schedule_entries:
+            _, group_id, room, _, teacher, _, _, _ = entry
+            self.schedule_index["Group"][str(group_id)].append(entry)
+            self.schedule_index["Teacher"][teacher].append(entry)
+            self.schedule_index["Room"][room].append(entry)
+
+        self.filter_options = {
+            "Group": [str(row[0]) for row in cursor.execute("SELECT id FROM groups")],
+            "Teacher": [row[0] for row in cursor.execute("SELECT name FROM teachers")],
+            "Room": [row[0] for row in cursor.execute("SELECT name FROM rooms")],
+        }
+        self.timeslot_ids = {(day, slot): tid for tid, day, slot in cursor.execute("SELECT id, day, slot FROM timeslots")}
+        self.data_version = version
+
+    def filtered_entries(self):
+        filter_type = self.view_type_var.get()
+        filter_value = self.view_value_var.get()
+        if filter_type in self.schedule_index and filter_value:
+            return self.schedule_index[filter_type].get(filter_value, [])
+        return self.schedule_entries
+
     def load_schedule(self):
         if not self.db_path:
             return
 
         try:
-            for row in self.tree.get_children():
-                self.tree.delete(row)
-
-            conn = self.connect()
-            cursor = conn.cursor()
-
-            base_query = '''
-            SELECT g.id, r.name, s.name, t.name, ts.day, ts.slot
-            FROM group_schedule gs
-            JOIN groups g ON gs.group_id = g.id
-            JOIN rooms r ON gs.room_id = r.id
-            JOIN timeslots ts ON gs.timeslot_id = ts.id
-            JOIN subjects s ON g.subject_id = s.id
-            JOIN teachers t ON g.teacher_id = t.id
-            '''
-
-            filter_type = self.view_type_var.get()
-            filter_value = self.view_value_var.get()
-
-            params = ()
-            if filter_type == "Group" and filter_value:
-                base_query += " WHERE g.id = ?"
-                params = (int(filter_value),)
-            elif filter_type == "Teacher" and filter_value:
-                base_query += " WHERE t.name = ?"
-                params = (filter_value,)
-            elif filter_type == "Room" and filter_value:
-                base_query += " WHERE r.name = ?"
-                params = (filter_value,)
-
-            schedule_grid = defaultdict(lambda: defaultdict(list))
-
-            for group_id, room, subject, teacher, day, slot in cursor.execute(base_query, params):
-                text = f"Group {group_id} ({subject})\n{teacher} @ {room}"
-                schedule_grid[day][slot].append(text)
-
-            conn.close()
+            self.refresh_index()
 
+            schedule_grid = defaultdict(list)
+            for _, group_id, room, subject, teacher, day, slot, _ in self.filtered_entries():
+                schedule_grid[(day, slot)].append(f"Group {group_id} ({subject})\n{teacher} @ {room}")
+
+            # Only rows whose text changed are pushed to the Treeview
             for slot_index in range(6):
-                values = []
-                for day in range(5):
-                    entries = schedule_grid[day][slot_index]
-                    values.append("\n\n".join(entries) if entries else "")
-                self.tree.insert("", "end", iid=slot_index, values=values)
+                values = tuple("\n\n".join(schedule_grid[(day, slot_index)]) for day in range(5))
+                if self.rendered.get(slot_index) != values:
+                    self.tree.item(slot_index, values=values)
+                    self.rendered[slot_index] = values
 
         except Exception as e:
             messagebox.showerror("Error loading schedule", str(e))
@@ -155,21 +189,12 @@ class ScheduleApp:
         if not self.db_path:
             return
 
-        conn = self.connect()
-        cursor = conn.cursor()
-        option_type = self.view_type_var.get()
-
-        if option_type == "Group":
-            cursor.execute("SELECT id FROM groups")
-            options = [str(row[0]) for row in cursor.fetchall()]
-        elif option_type == "Teacher":
-            cursor.execute("SELECT name FROM teachers")
-            options = [row[0] for row in cursor.fetchall()]
-        elif option_type == "Room":
-            cursor.execute("SELECT name FROM rooms")
-            options = [row[0] for row in cursor.fetchall()]
-        else:
-            options = []
+        try:
+            self.refresh_index()
+        except Exception as e:
+            messagebox.showerror("Error loading schedule", str(e))
+            return
+        options = self.filter_options.get(self.view_type_var.get(), [])
 
         self.value_selector["values"] = options
         if options:
@@ -177,21 +202,41 @@ class ScheduleApp:
         else:
             self.view_value_var.set("")
 
-        conn.close()
-
     def solve_schedule(self):
         if not self.db_path:
             return
 
-        def run_solver_with_popup():
-            loading = tk.Toplevel(self.root)
-            loading.title("Solving...")
-            tk.Label(loading, text="Solving schedule, please wait...").pack(padx=20, pady=20)
-            loading.geometry("300x100")
-            loading.transient(self.root)
-            loading.grab_set()
-            loading.update()
-
+        # The solver runs in a worker thread and only talks to Tk through
+        # this queue, which poll_solver drains with after().
+        self.solve_queue = queue.Queue()
+        self.solve_stop = threading.Event()
+        db_path = self.db_path
+        incremental = self.incremental_var.get()
+        try:
+            time_limit = self.time_limit_var.get()
+        except tk.TclError:
+            time_limit = 0
+        deadline = time.time() + time_limit if time_limit > 0 else None
+
+        self.loading = tk.Toplevel(self.root)
+        self.loading.title("Solving...")
+        self.progress_label = tk.Label(self.loading, text="Solving schedule, please wait...")
+        self.progress_label.pack(padx=20, pady=(20, 10))
+        ttk.Button(self.loading, text="Stop and keep best", command=self.solve_stop.set).pack(pady=(0, 20))
+        self.loading.geometry("360x120")
+        self.loading.transient(self.root)
+        self.loading.protocol("WM_DELETE_WINDOW", self.solve_stop.set)
+        self.loading.grab_set()
+        self.solve_button.config(state="disabled")
+
+        def ask_accept_partial(assigned, target, stored):
+            # Called from the worker; the question is asked by poll_solver.
+            reply = {"answer": False, "done": threading.Event()}
+            self.solve_queue.put(("ask", (assigned, target, stored, reply)))
+            reply["done"].wait()
+            return reply["answer"]
+
+        def run_solver_in_background():
             try:
                 base_dir = os.path.dirname(os.path.abspath(__file__))
                 solver_path = os.path.join(base_dir, "solver.py")
@@ -203,16 +248,49 @@ class ScheduleApp:
                 solver = importlib.util.module_from_spec(spec)
                 spec.loader.exec_module(solver)
 
-                result = solver.run_solver(self.db_path)
-                messagebox.showinfo("Solver", result)
-                self.load_schedule()
-
+                result = solver.run_solver(
+                    db_path, incremental=incremental, deadline=deadline, stop=self.solve_stop,
+                    progress=lambda info: self.solve_queue.put(("progress", info)),
+                    accept_partial=ask_accept_partial,
+                )
+                self.solve_queue.put(("done", result))
             except Exception as e:
-                messagebox.showerror("Solver Error", str(e))
-            finally:
-                loading.destroy()
+                self.solve_queue.put(("error", str(e)))
 
-        threading.Thread(target=run_solver_with_popup).start()
+        threading.Thread(target=run_solver_in_background, daemon=True).start()
+        self.root.after(100, self.poll_solver)
+
+    def poll_solver(self):
+        try:
+            while True:
+                kind, payload = self.solve_queue.get_nowait()
+                if kind == "progress":
+                    self.progress_label.config(
+                        text=f"Nodes: {payload['nodes']}  Depth: {payload['depth']}\n"
+                             f"Best partial: {payload['best']}  Elapsed: {payload['elapsed']:.1f}s"
+                    )
+                    continue
+                if kind == "ask":
+                    assigned, target, stored, reply = payload
+                    reply["answer"] = messagebox.askyesno(
+                        "Solver stopped",
+                        f"The best schedule found places {assigned} of {target} meetings; "
+                        f"the stored schedule places {stored}.\nReplace the stored schedule?",
+                        parent=self.loading,
+                    )
+                    reply["done"].set()
+                    continue
+                self.loading.destroy()
+                self.solve_button.config(state="normal")
+                if kind == "done":
+                    messagebox.showinfo("Solver", payload)
+                    self.load_schedule()
+                else:
+                    messagebox.showerror("Solver Error", payload)
+                return
+        except queue.Empty:
+            pass
+        self.root.after(100, self.poll_solver)
 
     def launch_editor(self):
         try:
@@ -262,59 +340,28 @@ class ScheduleApp:
     
     def swap_slots(self, day1, slot1, day2, slot2):
         try:
-            conn = self.connect()
-            cur = conn.cursor()
-
-            # Get timeslot IDs
-            cur.execute("SELECT id FROM timeslots WHERE day = ? AND slot = ?", (day1, slot1))
-            ts1 = cur.fetchone()
-            cur.execute("SELECT id FROM timeslots WHERE day = ? AND slot = ?", (day2, slot2))
-            ts2 = cur.fetchone()
-            if not ts1 or not ts2:
+            self.refresh_index()
+
+            ts1_id = self.timeslot_ids.get((day1, slot1))
+            ts2_id = self.timeslot_ids.get((day2, slot2))
+            if ts1_id is None or ts2_id is None:
                 messagebox.showerror("Error", "Time slot not found.")
                 return
 
-            ts1_id, ts2_id = ts1[0], ts2[0]
-
-            filter_type = self.view_type_var.get()
-            filter_value = self.view_value_var.get()
-
-            base_query = '''
-            SELECT gs.id, gs.group_id, gs.timeslot_id
-            FROM group_schedule gs
-            JOIN groups g ON gs.group_id = g.id
-            JOIN rooms r ON gs.room_id = r.id
-            JOIN timeslots ts ON gs.timeslot_id = ts.id
-            JOIN subjects s ON g.subject_id = s.id
-            JOIN teachers t ON g.teacher_id = t.id
-            '''
-
-            params = ()
-            if filter_type == "Group":
-                base_query += " WHERE g.id = ?"
-                params = (int(filter_value),)
-            elif filter_type == "Teacher":
-                base_query += " WHERE t.name = ?"
-                params = (filter_value,)
-            elif filter_type == "Room":
-                base_query += " WHERE r.name = ?"
-                params = (filter_value,)
-
-            cur.execute(base_query, params)
-            entries = cur.fetchall()
-
-            group_by_timeslot = {ts: (gs_id, group_id) for gs_id, group_id, ts in entries}
+            group_by_timeslot = {entry[7]: entry[0] for entry in self.filtered_entries()}
 
             gs1 = group_by_timeslot.get(ts1_id)
             gs2 = group_by_timeslot.get(ts2_id)
 
+            cur = self.conn.cursor()
             if gs1:
-                cur.execute("UPDATE group_schedule SET timeslot_id = ? WHERE id = ?", (ts2_id, gs1[0]))
+                cur.execute("UPDATE group_schedule SET timeslot_id = ? WHERE id = ?", (ts2_id, gs1))
             if gs2:
-                cur.execute("UPDATE group_schedule SET timeslot_id = ? WHERE id = ?", (ts1_id, gs2[0]))
+                cur.execute("UPDATE group_schedule SET timeslot_id = ? WHERE id = ?", (ts1_id, gs2))
+            self.conn.commit()
 
-            conn.commit()
-            conn.close()
+            # Our own commits do not change data_version
+            self.data_version = None
             self.load_schedule()
         except Exception as e:
             messagebox.showerror("Swap Error", str(e))